@@ -28,7 +28,7 @@ Suppose that X and Y are real-valued random variables with joint distribution fu
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from market_data import PriceStore
 import matplotlib.pyplot as plt
 import datetime as dt
 import seaborn as sns
@@ -67,9 +67,9 @@ CryptoCurrency : Bitcoin (BTC-USD)
 
 tickers =['^NBI','^IXIC','^GSPC','^RUT', 'BTC-USD','^DJI']
 
-quotes = pd.DataFrame()
-for ticker in tickers:
-  quotes[ticker] = yf.download(ticker, start_date, end_date)['Adj Close']
+#prices are cached locally; only dates not in the store yet are downloaded
+store = PriceStore('market_data')
+quotes = store.load(tickers, start_date, end_date)
 
 quotes = quotes.dropna()
 quotes
@@ -450,6 +450,15 @@ plotter(vine_r_samples)
 
 plotter_3d(vine_r_samples)
 
+"""The three vine structures above are fitted one after the other and only inspected visually. `compare_vines` fits the direct, center and regular structures with the pair-copulas of each tree level fitted in parallel, selects each pair family by AIC, and reports log-likelihood, AIC and BIC so the structures can be compared directly."""
+
+from vine import ParallelVine, compare_vines
+
+compare_vines(transcdf)
+
+parallel_vine = ParallelVine('regular').fit(transcdf)
+parallel_vine.summary()
+
 """# Clayton Copula
 
 Clayton Copula model dependence that is skewed towards the lower end of the distribution. It is given by:
@@ -503,6 +512,15 @@ def plot_clayton_copula(df):
     plt.show()
 plot_clayton_copula(transcdf)
 
+"""The tail scatter plots above only show extreme co-movements visually. `tail_dependence_table` computes the empirical lower and upper tail-dependence coefficients of every pair at several thresholds, with bootstrap bands, next to the coefficients implied by the fitted Gaussian copula and the first tree of the regular vine."""
+
+from tail_dependence import gaussian_pairs, tail_dependence_table, vine_pairs
+
+tail_table = tail_dependence_table(transcdf, thresholds=(0.01, 0.05, 0.10),
+                                   models={'Gaussian': gaussian_pairs(copula.correlation),
+                                           'Vine_r': vine_pairs(parallel_vine)})
+tail_table
+
 """# VaR"""
 
 portfolio_value  = 500000
@@ -564,6 +582,25 @@ plt.title(f'Distribution of Portfolio {window}-Day Rolling window (Dollar Value)
 plt.legend()
 plt.show()
 
+"""# Rolling VaR
+
+The figures above come from a single fit on the whole sample. For daily risk the copula is re-estimated on a rolling 1-year window; `rolling_copula_risk` updates ranks, correlations and Kendall taus incrementally as each day enters and leaves the window.
+"""
+
+from rolling_copula import rolling_copula_risk
+
+rolling_params, rolling_risk = rolling_copula_risk(log_return, window=252, horizon=window, portfolio_value=portfolio_value)
+rolling_risk.tail()
+
+"""The single VaR numbers above say nothing about calibration. `backtest` runs a rolling out-of-sample one-day VaR for every model and applies the Kupiec (proportion of failures) and Christoffersen (independence) tests to the exceedance series."""
+
+from backtest import backtest, select_model
+
+backtest_result = backtest(log_return, confidence_levels=(0.95, 0.99))
+production_model, model_scores = select_model(backtest_result['tests'])
+print(f'Selected model: {production_model}')
+backtest_result['tests']
+
 """#Conclusion
 
 
@@ -0,0 +1,240 @@
+"""Marginal distribution fitting for copula scenario generation.
+
+The notebook fits ``t``, ``beta`` and ``cauchy`` per asset only to plot them,
+and the VaR step then maps copula samples through ``norm.fit`` marginals.
+``fit_marginals`` fits every candidate family to every asset in a process
+pool, keeps the best family per asset by AIC and returns a ``MarginalSet``
+whose ``ppf`` turns a whole ``(n_sims, assets)`` matrix of copula samples into
+returns in one call per asset.
+
+Candidate families:
+
+* ``normal`` and ``t`` (``scipy.stats``),
+* ``skew_t``, the Jones-Faddy skew-t (``scipy.stats.jf_skew_t``),
+* ``gpd_tails``, a normal body spliced with generalised Pareto lower and upper
+  tails beyond the ``tail_fraction`` quantiles.
+
+Fitted parameters are cached on disk keyed by a hash of the data, so re-running
+the study on the same window does not refit anything.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+FAMILIES = ('normal', 't', 'skew_t', 'gpd_tails')
+TAIL_FRACTION = 0.1
+FIT_VERSION = 3
+# jf_skew_t's normalising constant overflows for a + b beyond about 2000; a t
+# with 200 degrees of freedom is already indistinguishable from the normal
+MAX_START_DF = 200.0
+
+logger = logging.getLogger(__name__)
+
+
+class GPDTails:
+    """Normal body with generalised Pareto tails, parameterised as a flat tuple."""
+
+    @staticmethod
+    def fit(x, tail_fraction=TAIL_FRACTION):
+        lo, hi = np.quantile(x, [tail_fraction, 1 - tail_fraction])
+        mu, sigma = stats.norm.fit(x)
+        c_lo, _, s_lo = stats.genpareto.fit(lo - x[x < lo], floc=0)
+        c_hi, _, s_hi = stats.genpareto.fit(x[x > hi] - hi, floc=0)
+        return (mu, sigma, lo, hi, c_lo, s_lo, c_hi, s_hi, tail_fraction)
+
+    @staticmethod
+    def _body_mass(params):
+        mu, sigma, lo, hi = params[:4]
+        return stats.norm.cdf(lo, mu, sigma), stats.norm.cdf(hi, mu, sigma)
+
+    @classmethod
+    def logpdf(cls, x, params):
+        mu, sigma, lo, hi, c_lo, s_lo, c_hi, s_hi, p = params
+        f_lo, f_hi = cls._body_mass(params)
+        out = stats.norm.logpdf(x, mu, sigma) + np.log((1 - 2 * p) / (f_hi - f_lo))
+        out = np.where(x < lo, np.log(p) + stats.genpareto.logpdf(lo - x, c_lo, 0, s_lo), out)
+        return np.where(x > hi, np.log(p) + stats.genpareto.logpdf(x - hi, c_hi, 0, s_hi), out)
+
+    @classmethod
+    def ppf(cls, u, params):
+        mu, sigma, lo, hi, c_lo, s_lo, c_hi, s_hi, p = params
+        f_lo, f_hi = cls._body_mass(params)
+        u = np.asarray(u, dtype=float)
+        body = stats.norm.ppf(f_lo + (u - p) / (1 - 2 * p) * (f_hi - f_lo), mu, sigma)
+        lower = lo - stats.genpareto.ppf(1 - np.minimum(u, p) / p, c_lo, 0, s_lo)
+        upper = hi + stats.genpareto.ppf((np.maximum(u, 1 - p) - (1 - p)) / p, c_hi, 0, s_hi)
+        return np.where(u < p, lower, np.where(u > 1 - p, upper, body))
+
+    @classmethod
+    def cdf(cls, x, params):
+        mu, sigma, lo, hi, c_lo, s_lo, c_hi, s_hi, p = params
+        f_lo, f_hi = cls._body_mass(params)
+        x = np.asarray(x, dtype=float)
+        body = p + (stats.norm.cdf(x, mu, sigma) - f_lo) / (f_hi - f_lo) * (1 - 2 * p)
+        lower = p * stats.genpareto.sf(lo - x, c_lo, 0, s_lo)
+        upper = 1 - p * stats.genpareto.sf(x - hi, c_hi, 0, s_hi)
+        return np.where(x < lo, lower, np.where(x > hi, upper, body))
+
+
+def _scipy_dist(family):
+    return {'normal': stats.norm, 't': stats.t, 'skew_t': stats.jf_skew_t}[family]
+
+
+class Marginal:
+    def __init__(self, family, params, loglik, n_obs):
+        self.family = family
+        self.params = tuple(params)
+        self.loglik = loglik
+        self.n_obs = n_obs
+
+    @property
+    def n_params(self):
+        # the splice thresholds and tail fraction of gpd_tails are not free parameters
+        return 6 if self.family == 'gpd_tails' else len(self.params)
+
+    @property
+    def aic(self):
+        return 2 * self.n_params - 2 * self.loglik
+
+    @property
+    def bic(self):
+        return self.n_params * np.log(self.n_obs) - 2 * self.loglik
+
+    def ppf(self, u):
+        if self.family == 'gpd_tails':
+            return GPDTails.ppf(u, self.params)
+        return _scipy_dist(self.family).ppf(u, *self.params)
+
+    def cdf(self, x):
+        if self.family == 'gpd_tails':
+            return GPDTails.cdf(x, self.params)
+        return _scipy_dist(self.family).cdf(x, *self.params)
+
+    def to_dict(self):
+        return {'family': self.family, 'params': list(self.params),
+                'loglik': self.loglik, 'n_obs': self.n_obs}
+
+
+def _fit_skew_t(x):
+    # jf_skew_t with a = b = df / 2 is exactly the Student t, so the t fit is
+    # both the starting point and a floor: the generic optimiser started from
+    # scipy's default guess stops below the nested t likelihood
+    df, loc, scale = stats.t.fit(x)
+    df = min(df, MAX_START_DF)
+    start = (df / 2, df / 2, loc, scale)
+    params = stats.jf_skew_t.fit(x, df / 2, df / 2, loc=loc, scale=scale)
+    # also covers a non-finite likelihood at the optimiser's end point
+    if not stats.jf_skew_t.logpdf(x, *params).sum() >= stats.jf_skew_t.logpdf(x, *start).sum():
+        return start
+    return params
+
+
+def fit_family(x, family):
+    """Maximum likelihood fit of one family to one return series."""
+    x = np.asarray(x, dtype=float)
+    if family == 'gpd_tails':
+        params = GPDTails.fit(x)
+        loglik = GPDTails.logpdf(x, params).sum()
+    elif family == 'skew_t':
+        params = _fit_skew_t(x)
+        loglik = stats.jf_skew_t.logpdf(x, *params).sum()
+    else:
+        dist = _scipy_dist(family)
+        params = dist.fit(x)
+        loglik = dist.logpdf(x, *params).sum()
+    return Marginal(family, [float(p) for p in params], float(loglik), len(x))
+
+
+def _fit_task(args):
+    return fit_family(*args)
+
+
+def _data_key(x, family):
+    # the version invalidates fits cached before the skew-t start values changed
+    key = f'{family}:{FIT_VERSION}'.encode()
+    return hashlib.sha1(np.ascontiguousarray(x, dtype=float).tobytes() + key).hexdigest()
+
+
+class MarginalSet:
+    """Selected marginal of every asset, with a vectorised ``ppf`` over all assets."""
+
+    def __init__(self, marginals, candidates=None):
+        self.marginals = marginals
+        self.candidates = candidates or {}
+
+    def ppf(self, u):
+        """Map an ``(n, assets)`` array or DataFrame of uniforms to returns."""
+        columns = list(self.marginals)
+        u = np.clip(np.asarray(u[columns] if isinstance(u, pd.DataFrame) else u, dtype=float),
+                    1e-6, 1 - 1e-6)
+        out = np.empty_like(u)
+        for j, asset in enumerate(columns):
+            out[:, j] = self.marginals[asset].ppf(u[:, j])
+        return out
+
+    def summary(self):
+        """AIC of every candidate family per asset, the selected one flagged."""
+        rows = []
+        for asset, fits in self.candidates.items():
+            for m in fits:
+                rows.append({'asset': asset, 'family': m.family, 'loglik': m.loglik,
+                             'aic': m.aic, 'bic': m.bic,
+                             'selected': m.family == self.marginals[asset].family})
+        return pd.DataFrame(rows)
+
+
+def fit_marginals(log_return, families=FAMILIES, criterion='aic', cache_dir=None, n_jobs=None):
+    """Fit all candidate families to all assets in parallel and select by AIC/BIC.
+
+    Args:
+        log_return (pd.DataFrame): returns, one column per asset.
+        families (tuple): candidate families, see ``FAMILIES``.
+        criterion (str): ``'aic'`` or ``'bic'``.
+        cache_dir (str): directory of cached fits, ``None`` to disable.
+        n_jobs (int): worker processes.
+
+    Returns:
+        MarginalSet
+    """
+    tasks, results = [], {}
+    for asset in log_return.columns:
+        x = log_return[asset].to_numpy(dtype=float)
+        for family in families:
+            path = cache_dir and os.path.join(cache_dir, f'{_data_key(x, family)}.json')
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    cached = json.load(f)
+                results[asset, family] = Marginal(cached['family'], cached['params'],
+                                                  cached['loglik'], cached['n_obs'])
+            else:
+                tasks.append((asset, family, x, path))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            fitted = pool.map(_fit_task, [(x, family) for _, family, x, _ in tasks])
+            for (asset, family, _, path), marginal in zip(tasks, fitted):
+                results[asset, family] = marginal
+                if path:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    with open(path, 'w') as f:
+                        json.dump(marginal.to_dict(), f)
+
+    selected, candidates = {}, {}
+    for asset in log_return.columns:
+        fits = []
+        for family in families:
+            m = results[asset, family]
+            if np.isfinite(m.loglik):
+                fits.append(m)
+            else:
+                logger.warning('%s: discarding the %s marginal, its log-likelihood is %s', asset, family, m.loglik)
+        candidates[asset] = fits
+        selected[asset] = min(fits, key=lambda m: getattr(m, criterion))
+    return MarginalSet(selected, candidates)
@@ -0,0 +1,164 @@
+"""Local, memory-mapped price store for the copula study.
+
+Prices are kept column-wise on disk, one directory per ticker::
+
+    <root>/<ticker>/dates.npy    datetime64[D], sorted
+    <root>/<ticker>/close.npy    float64 adjusted close
+    <root>/<ticker>/meta.json    date range already covered by the source
+
+and read back with ``np.load(..., mmap_mode='r')``, so loading many tickers
+does not copy whole histories into memory. ``meta.json`` records the covered
+range: at the start it is the requested date once that request returned
+prices, so holidays before the first session are not fetched again. At the
+end it is the last date that actually came back, so today's unfinished
+session and failed or empty fetches are fetched again on the next run.
+
+The data source is pluggable: anything with a
+``fetch(tickers, start, end) -> pd.DataFrame`` method works.
+``YFinanceFetcher`` downloads from Yahoo in one batched call and
+``CSVFetcher`` reads ``<ticker>.csv`` files so the study can run offline.
+"""
+
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+class YFinanceFetcher:
+    """Adjusted close prices from Yahoo Finance."""
+
+    def fetch(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(list(tickers), start=start, end=end + pd.Timedelta(days=1),
+                           auto_adjust=False, group_by='column', progress=False)
+        if data.empty:
+            return pd.DataFrame(columns=list(tickers), dtype=float)
+        close = data['Adj Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        return close
+
+
+class CSVFetcher:
+    """Offline stand-in reading ``<directory>/<ticker>.csv`` (``Date``, ``Adj Close``)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, tickers, start, end):
+        out = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+            out[ticker] = df['Adj Close'].loc[start:end]
+        return pd.DataFrame(out)
+
+
+class PriceStore:
+    def __init__(self, root, fetcher=None):
+        self.root = root
+        self.fetcher = fetcher if fetcher is not None else YFinanceFetcher()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, ticker):
+        # tickers such as ^GSPC or BTC-USD are valid directory names, but keep
+        # path separators out just in case
+        return os.path.join(self.root, ticker.replace(os.sep, '_'))
+
+    def _coverage(self, ticker):
+        path = os.path.join(self._dir(ticker), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def _read(self, ticker, mmap_mode='r'):
+        path = self._dir(ticker)
+        if not os.path.exists(os.path.join(path, 'dates.npy')):
+            return np.empty(0, dtype='datetime64[D]'), np.empty(0)
+        return (np.load(os.path.join(path, 'dates.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(path, 'close.npy'), mmap_mode=mmap_mode))
+
+    def _write(self, ticker, dates, close, start, end):
+        path = self._dir(ticker)
+        os.makedirs(path, exist_ok=True)
+        # write to temporary files and rename, so readers holding a memory map
+        # never see a half written array
+        for name, arr in (('dates', dates), ('close', close)):
+            tmp = os.path.join(path, f'{name}.tmp.npy')
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(path, f'{name}.npy'))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'start': str(start.date()), 'end': str(end.date())}, f)
+
+    def _missing_ranges(self, ticker, start, end):
+        coverage = self._coverage(ticker)
+        if coverage is None:
+            return [(start, end)]
+        have_start, have_end = coverage
+        ranges = []
+        if start < have_start:
+            ranges.append((start, have_start - pd.Timedelta(days=1)))
+        if end > have_end:
+            ranges.append((have_end + pd.Timedelta(days=1), end))
+        return ranges
+
+    def update(self, tickers, start, end):
+        """Fetch only the date ranges that are not stored yet."""
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+
+        # tickers that miss the same range are fetched in one call
+        requests = defaultdict(list)
+        for ticker in tickers:
+            for rng in self._missing_ranges(ticker, start, end):
+                requests[rng].append(ticker)
+
+        fetched = defaultdict(list)
+        for (lo, hi), group in requests.items():
+            frame = self.fetcher.fetch(group, lo, hi)
+            for ticker in group:
+                if ticker in frame:
+                    fetched[ticker].append(frame[ticker].dropna())
+
+        for ticker in tickers:
+            received = [s for s in fetched[ticker] if len(s)]
+            if not received:
+                # nothing came back (failure, holiday or future dates): keep the
+                # coverage as it is so the range is requested again next time
+                continue
+            first = min(s.index.min() for s in received).normalize()
+            last = max(s.index.max() for s in received).normalize()
+            coverage = self._coverage(ticker)
+            if coverage is None:
+                new_start, new_end = start, last
+            else:
+                new_start = start if first < coverage[0] else coverage[0]
+                new_end = max(last, coverage[1])
+
+            dates, close = self._read(ticker, mmap_mode=None)
+            old = pd.Series(close, index=pd.DatetimeIndex(dates))
+            series = pd.concat(([old] if len(old) else []) + received)
+            series = series[~series.index.duplicated(keep='last')].sort_index()
+            self._write(ticker, series.index.values.astype('datetime64[D]'),
+                        series.to_numpy(dtype=float), new_start, new_end)
+
+    def load(self, tickers, start, end, update=True):
+        """Adjusted close prices of many tickers as one DataFrame, one column per ticker."""
+        if update:
+            self.update(tickers, start, end)
+        lo = np.datetime64(pd.Timestamp(start).date(), 'D')
+        hi = np.datetime64(pd.Timestamp(end).date(), 'D')
+
+        columns = {}
+        for ticker in tickers:
+            dates, close = self._read(ticker)
+            i, j = np.searchsorted(dates, lo, 'left'), np.searchsorted(dates, hi, 'right')
+            columns[ticker] = pd.Series(close[i:j], index=pd.DatetimeIndex(dates[i:j]))
+        return pd.DataFrame(columns)[list(tickers)]
@@ -0,0 +1,103 @@
+"""Figures of the copula study, rendered to files.
+
+Only imported by ``copula_study.run(plots=True)``; the batch path never loads
+matplotlib. Uses the non-interactive Agg backend so it also works headless.
+"""
+
+import os
+from itertools import combinations
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+
+def _grid(n, cols, size, **kwargs):
+    rows = (n + cols - 1) // cols
+    fig, axes = plt.subplots(rows, cols, figsize=(size[0], size[1] * rows), squeeze=False, **kwargs)
+    axes = axes.flatten()
+    for ax in axes[n:]:
+        ax.axis('off')
+    return fig, axes
+
+
+def _save(fig, path):
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_prices(quotes, path):
+    fig, ax = plt.subplots(figsize=(18, 10))
+    ax.plot(np.log(quotes))
+    ax.set_title('Log Prices')
+    ax.set_xlabel('Date')
+    ax.legend(quotes.columns)
+    _save(fig, path)
+
+
+def plot_histograms(log_return, path):
+    fig, axes = _grid(log_return.shape[1], 3, (17, 5))
+    for col, ax in zip(log_return.columns, axes):
+        sns.histplot(log_return[col], ax=ax, bins=40, kde=True)
+        ax.set_title(col)
+        ax.set_ylabel('Frequency')
+    _save(fig, path)
+
+
+def plot_pairs(simulated, original, path):
+    pairs = list(combinations(original.columns, 2))
+    fig, axes = _grid(len(pairs), 3, (14, 3.6))
+    for ax, (var1, var2) in zip(axes, pairs):
+        ax.scatter(simulated[var1], simulated[var2], label='Simulated', alpha=0.4)
+        ax.scatter(original[var1], original[var2], label='Original', alpha=0.2)
+        ax.set_xlabel(var1)
+        ax.set_ylabel(var2)
+        ax.set_title(f'{var1} vs {var2}')
+        ax.legend()
+    _save(fig, path)
+
+
+def plot_pairs_3d(simulated, original, path):
+    triples = list(combinations(original.columns, 3))
+    fig, axes = _grid(len(triples), 4, (16, 4.4), subplot_kw={'projection': '3d'})
+    for ax, (var1, var2, var3) in zip(axes, triples):
+        ax.scatter(simulated[var1], simulated[var2], simulated[var3], label='Simulated', alpha=0.4)
+        ax.scatter(original[var1], original[var2], original[var3], label='Original', alpha=0.4)
+        ax.set_xlabel(var1)
+        ax.set_ylabel(var2)
+        ax.set_zlabel(var3)
+        ax.set_title(f'{var1} vs {var2} vs {var3}')
+        ax.legend()
+    _save(fig, path)
+
+
+def plot_var(range_returns, var, confidence_interval, window, portfolio_value, path):
+    fig, ax = plt.subplots(figsize=(16, 8))
+    first = next(iter(range_returns.values())) * portfolio_value
+    ax.hist(first, bins=60, density=True)
+    sns.kdeplot(first, bw_adjust=0.5, color='blue', ax=ax)
+    for name, value in var.items():
+        ax.axvline(-value, linestyle='dashed', label=name)
+    ax.set_ylabel('Density')
+    ax.set_xlabel(f'{window}-Day Portfolio Return (Dollar Value)')
+    ax.set_title(f'Distribution of Portfolio {window}-Day Rolling window (Dollar Value) '
+                 f'at {confidence_interval:.0%} confidence level')
+    ax.legend()
+    _save(fig, path)
+
+
+def render_all(directory, quotes, log_return, transcdf, samples, range_returns, var,
+               confidence_interval, window, portfolio_value):
+    os.makedirs(directory, exist_ok=True)
+    plot_prices(quotes, os.path.join(directory, 'log_prices.png'))
+    plot_histograms(log_return, os.path.join(directory, 'histograms.png'))
+    for name, sample in samples.items():
+        plot_pairs(sample, transcdf, os.path.join(directory, f'{name}_pairs.png'))
+        plot_pairs_3d(sample, transcdf, os.path.join(directory, f'{name}_pairs_3d.png'))
+    plot_var(range_returns, var, confidence_interval, window, portfolio_value,
+             os.path.join(directory, 'var.png'))
@@ -0,0 +1,173 @@
+"""Tail-dependence coefficients as data.
+
+For a threshold ``q`` the empirical coefficients of assets ``i`` and ``j`` are
+
+    lambda_L(q) = P(U_j <= q | U_i <= q)
+    lambda_U(q) = P(U_j > 1 - q | U_i > 1 - q)
+
+With ``L = 1{U <= q}`` the joint exceedance counts of all pairs are a single
+matrix product ``L^T L``, so every pair and threshold is computed at once on
+the pseudo-observation matrix instead of a percentile scan per pair.
+
+Bootstrap bands resample days and are spread over worker processes, each with
+its own seed stream. Copula-implied coefficients at the same thresholds
+(``C(q, q) / q`` and its survival counterpart) and their asymptotic limits are
+available for the pair families used in ``vine.py`` so the fitted models can be
+compared with the data.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy.stats import multivariate_normal, norm
+
+
+def tail_dependence_matrices(u, thresholds=(0.01, 0.05, 0.10)):
+    """Empirical lower and upper coefficients, each of shape ``(thresholds, d, d)``."""
+    u = np.asarray(u, dtype=float)
+    q = np.asarray(thresholds)[:, None, None]
+    low = (u[None] <= q).astype(float)
+    high = (u[None] > 1 - q).astype(float)
+    # joint counts / marginal counts, so ties in the ranks do not bias the ratio
+    lower = low.transpose(0, 2, 1) @ low / np.maximum(low.sum(axis=1), 1)[:, :, None]
+    upper = high.transpose(0, 2, 1) @ high / np.maximum(high.sum(axis=1), 1)[:, :, None]
+    return lower, upper
+
+
+def _bootstrap_chunk(u, thresholds, n_boot, seed):
+    rng = np.random.default_rng(seed)
+    n = u.shape[0]
+    lower, upper = [], []
+    for _ in range(n_boot):
+        lo, up = tail_dependence_matrices(u[rng.integers(0, n, n)], thresholds)
+        lower.append(lo)
+        upper.append(up)
+    return np.stack(lower), np.stack(upper)
+
+
+def bootstrap_tail_dependence(u, thresholds=(0.01, 0.05, 0.10), n_boot=1000, alpha=0.05,
+                              n_jobs=None, seed=42):
+    """Percentile bootstrap bands for ``tail_dependence_matrices``.
+
+    Returns ``(lower_band, upper_band)``; each has shape ``(2, thresholds, d, d)``
+    holding the ``alpha / 2`` and ``1 - alpha / 2`` quantiles.
+    """
+    u = np.asarray(u, dtype=float)
+    workers = n_jobs or 4
+    sizes = [len(c) for c in np.array_split(np.arange(n_boot), workers) if len(c)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = list(pool.map(partial(_bootstrap_chunk, u, thresholds), sizes, seeds))
+
+    lower = np.concatenate([c[0] for c in chunks])
+    upper = np.concatenate([c[1] for c in chunks])
+    qs = [alpha / 2, 1 - alpha / 2]
+    return np.quantile(lower, qs, axis=0), np.quantile(upper, qs, axis=0)
+
+
+def _gaussian_cdf(u, v, rho):
+    x, y = norm.ppf(u), norm.ppf(v)
+    return multivariate_normal(mean=[0, 0], cov=[[1, rho], [rho, 1]]).cdf(np.column_stack([x, y]))
+
+
+def _clayton_cdf(u, v, theta):
+    return (u ** -theta + v ** -theta - 1) ** (-1 / theta)
+
+
+def _gumbel_cdf(u, v, theta):
+    return np.exp(-((-np.log(u)) ** theta + (-np.log(v)) ** theta) ** (1 / theta))
+
+
+def _frank_cdf(u, v, theta):
+    return -np.log1p(np.expm1(-theta * u) * np.expm1(-theta * v) / np.expm1(-theta)) / theta
+
+
+def _survival(cdf, u, v, theta):
+    return u + v - 1 + cdf(1 - u, 1 - v, theta)
+
+
+# name: (copula cdf, asymptotic (lambda_L, lambda_U))
+COPULA_CDFS = {
+    'independence': (lambda u, v, t: u * v, lambda t: (0.0, 0.0)),
+    'gaussian': (_gaussian_cdf, lambda t: (0.0, 0.0)),
+    'clayton': (_clayton_cdf, lambda t: (2 ** (-1 / t), 0.0)),
+    'gumbel': (_gumbel_cdf, lambda t: (0.0, 2 - 2 ** (1 / t))),
+    'frank': (_frank_cdf, lambda t: (0.0, 0.0)),
+    'clayton_180': (partial(_survival, _clayton_cdf), lambda t: (0.0, 2 ** (-1 / t))),
+    'gumbel_180': (partial(_survival, _gumbel_cdf), lambda t: (2 - 2 ** (1 / t), 0.0)),
+}
+
+
+def implied_tail_dependence(family, theta, thresholds=(0.01, 0.05, 0.10)):
+    """Tail-dependence implied by a bivariate copula.
+
+    Returns ``(lower, upper, limits)``: coefficients at each threshold and the
+    asymptotic ``(lambda_L, lambda_U)`` as ``q -> 0``.
+    """
+    cdf, limits = COPULA_CDFS[family]
+    q = np.asarray(thresholds, dtype=float)
+    lower = cdf(q, q, theta) / q
+    upper = (2 * q - 1 + cdf(1 - q, 1 - q, theta)) / q
+    return lower, upper, limits(theta)
+
+
+def gaussian_pairs(corr):
+    """Pair specs ``{(a, b): ('gaussian', rho)}`` from a correlation DataFrame."""
+    return {(a, b): ('gaussian', corr.loc[a, b]) for a, b in combinations(corr.columns, 2)}
+
+
+def vine_pairs(vine):
+    """Pair specs of the unconditional (first tree) pair-copulas of a ``ParallelVine``."""
+    specs = {}
+    for fit in vine.trees[0]:
+        a, b = sorted([fit['L'], fit['R']])
+        specs[vine.columns[a], vine.columns[b]] = (fit['family'], fit['theta'])
+    return specs
+
+
+def tail_dependence_table(u, thresholds=(0.01, 0.05, 0.10), models=None,
+                          n_boot=1000, alpha=0.05, n_jobs=None, seed=42):
+    """Tidy table of empirical and copula-implied tail-dependence coefficients.
+
+    Args:
+        u (pd.DataFrame): pseudo-observations, one column per asset.
+        thresholds (tuple): tail probabilities ``q``.
+        models (dict): ``{model name: {(a, b): (family, theta)}}`` as built by
+            ``gaussian_pairs`` or ``vine_pairs``; pairs a model does not cover
+            are left empty.
+        n_boot (int): bootstrap resamples, ``0`` to skip the bands.
+
+    Returns:
+        pd.DataFrame: one row per ``(tail, threshold, asset_1, asset_2)`` with
+        ``empirical``, ``ci_low``, ``ci_high``, one column per model and one
+        ``<model>_limit`` column for its asymptotic coefficient.
+    """
+    assets = list(u.columns)
+    lower, upper = tail_dependence_matrices(u, thresholds)
+    if n_boot:
+        lower_band, upper_band = bootstrap_tail_dependence(u, thresholds, n_boot, alpha, n_jobs, seed)
+
+    rows = []
+    for (i, a), (j, b) in combinations(enumerate(assets), 2):
+        implied = {}
+        for name, specs in (models or {}).items():
+            spec = specs.get((a, b)) or specs.get((b, a))
+            if spec is not None:
+                implied[name] = implied_tail_dependence(spec[0], spec[1], thresholds)
+
+        for k, q in enumerate(thresholds):
+            for tail, matrix, band, side in (('lower', lower, lower_band if n_boot else None, 0),
+                                             ('upper', upper, upper_band if n_boot else None, 1)):
+                row = {'tail': tail, 'threshold': q, 'asset_1': a, 'asset_2': b,
+                       'empirical': matrix[k, i, j]}
+                if band is not None:
+                    row['ci_low'], row['ci_high'] = band[0, k, i, j], band[1, k, i, j]
+                for name, (lo, up, limits) in implied.items():
+                    row[name] = (lo, up)[side][k]
+                    row[f'{name}_limit'] = limits[side]
+                rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,104 @@
+"""Isolation Forest anomaly filter, fitted once and reused.
+
+``anomaly_detection(df, *args)`` refitted ``IsolationForest()`` on every call,
+wrote an ``IF_anomaly`` column into the caller's DataFrame and returned a
+``.copy()`` of the inliers. ``AnomalyFilter`` splits this into
+
+* ``fit`` on a sample, a DataFrame or a bounded random sample of a CSV file
+  (``sample_csv`` keeps the rows with the ``n`` smallest random keys while
+  streaming, so it never holds more than ``n + chunksize`` rows),
+* ``save`` / ``load`` of the fitted forest with joblib,
+* ``mask``: a boolean inlier mask, scored in ``n_jobs`` parts on a thread
+  pool; the input is not modified and nothing is copied until the caller
+  indexes with the mask,
+* ``iter_masks`` / ``filter_csv`` for applicant files larger than memory.
+
+An Isolation Forest draws ``max_samples`` (256) rows per tree anyway, so a
+sample of a few ten thousand rows fits the same forest as the full data.
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+
+
+def sample_csv(path, n, columns=None, chunksize=100000, seed=None):
+    """Uniform random sample of ``n`` rows of a CSV file, in bounded memory."""
+    rng = np.random.default_rng(seed)
+    kept, keys = None, np.empty(0)
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        chunk_keys = rng.random(len(chunk))
+        rows = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        keys = np.concatenate([keys, chunk_keys])
+        if len(keys) > n:
+            order = np.argpartition(keys, n)[:n]
+            rows, keys = rows.iloc[order].reset_index(drop=True), keys[order]
+        kept = rows
+    return kept
+
+
+class AnomalyFilter:
+    def __init__(self, columns, n_jobs=1, chunksize=50000, **forest_params):
+        """
+        Args:
+            columns (list): features the forest is fitted on (``*args`` of ``anomaly_detection``).
+            n_jobs (int): threads each ``mask`` call is split over.
+            chunksize (int): rows per streamed chunk.
+            forest_params: passed to ``IsolationForest``.
+        """
+        self.columns = list(columns)
+        self.n_jobs = n_jobs
+        self.chunksize = chunksize
+        self.forest_params = forest_params
+        self.model = None
+
+    def fit(self, data, sample_size=None, seed=None):
+        """Fit on a DataFrame or a CSV path, optionally on a random sample of ``sample_size`` rows."""
+        if isinstance(data, pd.DataFrame):
+            if sample_size is not None and len(data) > sample_size:
+                data = data.sample(sample_size, random_state=seed)
+        else:
+            data = sample_csv(data, sample_size, self.columns, self.chunksize, seed) if sample_size \
+                else pd.read_csv(data, usecols=self.columns)
+        self.model = IsolationForest(random_state=seed, **self.forest_params).fit(data[self.columns].to_numpy())
+        return self
+
+    def save(self, path):
+        joblib.dump({'columns': self.columns, 'model': self.model}, path)
+
+    @classmethod
+    def load(cls, path, n_jobs=1, chunksize=50000):
+        saved = joblib.load(path)
+        anomaly_filter = cls(saved['columns'], n_jobs, chunksize)
+        anomaly_filter.model = saved['model']
+        return anomaly_filter
+
+    def _predict(self, X):
+        return self.model.predict(X) != -1
+
+    def mask(self, df):
+        """Boolean mask of the inlier rows of ``df``, split over ``n_jobs`` threads."""
+        X = df[self.columns].to_numpy()
+        # one part per thread, so the ``chunksize`` chunks of ``iter_masks`` are split too
+        step = max(1, -(-len(X) // self.n_jobs))
+        if self.n_jobs == 1 or len(X) < 2 * step:
+            return self._predict(X)
+        parts = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(self._predict)(X[start:start + step]) for start in range(0, len(X), step))
+        return np.concatenate(parts)
+
+    def iter_masks(self, path, **read_csv_kwargs):
+        """Yield ``(chunk, mask)`` for a CSV file, ``chunksize`` rows at a time."""
+        for chunk in pd.read_csv(path, chunksize=self.chunksize, **read_csv_kwargs):
+            yield chunk, self.mask(chunk)
+
+    def filter_csv(self, source, destination, **read_csv_kwargs):
+        """Write the inlier rows of ``source`` to ``destination``; returns ``(rows, kept)``."""
+        rows, kept = 0, 0
+        for i, (chunk, mask) in enumerate(self.iter_masks(source, **read_csv_kwargs)):
+            chunk[mask].to_csv(destination, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+            kept += int(mask.sum())
+        return rows, kept
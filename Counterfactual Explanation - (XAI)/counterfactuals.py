@@ -0,0 +1,248 @@
+"""Batched counterfactual generation for the loan model.
+
+``dice_ml.Dice(...).generate_counterfactuals`` explains one query at a time and
+its random / genetic search calls the Keras model on a few candidates per
+step. ``CounterfactualEngine`` runs the same kind of random search for a whole
+batch of applicants:
+
+* the feature metadata DiCE derives from ``dice_ml.Data`` (continuous ranges
+  and precision, categorical levels, MAD scales for the distance) is computed
+  once into a ``FeatureSpace`` that can be saved and reloaded,
+* for every query ``n_samples`` candidates are drawn that change between one
+  and ``max_changes`` mutable features; the candidates of all queries are
+  scored with one large ``predict_fn`` call per round,
+* per query, the valid candidates (desired class reached) closest in
+  MAD-normalised L1 distance are kept, preferring different sets of changed
+  features first so the explanations are diverse; queries without enough
+  counterfactuals get another round with twice the samples,
+* with ``n_jobs > 1`` chunks of queries are spread over a process pool whose
+  workers rebuild the model once from a picklable ``model_factory``.
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+
+class FeatureSpace:
+    def __init__(self, features, continuous, low, high, decimals, categories, mad, outcome=None):
+        self.features = list(features)
+        self.continuous = list(continuous)
+        self.low, self.high = dict(low), dict(high)
+        self.decimals = dict(decimals)
+        self.categories = {f: list(v) for f, v in categories.items()}
+        self.mad = dict(mad)
+        self.outcome = outcome
+
+    @classmethod
+    def from_dataframe(cls, df, continuous, outcome=None):
+        features = [c for c in df.columns if c != outcome]
+        low, high, decimals, categories, mad = {}, {}, {}, {}, {}
+        for f in features:
+            values = df[f]
+            if f in continuous:
+                low[f], high[f] = float(values.min()), float(values.max())
+                # precision as in DiCE: the largest number of decimals in the data
+                text = values.astype(str).str.split('.', n=1).str[1].fillna('')
+                decimals[f] = int(text.str.rstrip('0').str.len().max())
+                deviation = float(np.median(np.abs(values - values.median())))
+                mad[f] = deviation if deviation > 0 else 1.0
+            else:
+                categories[f] = sorted(values.unique().tolist())
+        return cls(features, continuous, low, high, decimals, categories, mad, outcome)
+
+    @classmethod
+    def from_dice_data(cls, data):
+        """Metadata of a ``dice_ml.Data`` built from a DataFrame."""
+        return cls.from_dataframe(data.data_df, data.continuous_feature_names, data.outcome_name)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.__dict__, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def scales(self):
+        """Distance weight of every feature: 1 / MAD for continuous, 1 for categorical mismatch."""
+        return np.array([1.0 / self.mad[f] if f in self.continuous else 1.0 for f in self.features])
+
+    def sample_values(self, n, rng):
+        """``n x m`` matrix of random feature values within the data ranges."""
+        out = np.empty((n, len(self.features)))
+        for j, f in enumerate(self.features):
+            if f in self.continuous:
+                out[:, j] = np.round(rng.uniform(self.low[f], self.high[f], n), self.decimals[f])
+            else:
+                out[:, j] = rng.choice(np.asarray(self.categories[f], dtype=float), n)
+        return out
+
+    def snap(self, X):
+        """Round continuous features to their precision and move categorical ones to the nearest level."""
+        X = np.array(X, dtype=float)
+        for j, f in enumerate(self.features):
+            if f in self.continuous:
+                X[:, j] = np.round(np.clip(X[:, j], self.low[f], self.high[f]), self.decimals[f])
+            else:
+                levels = np.asarray(self.categories[f], dtype=float)
+                right = np.clip(np.searchsorted(levels, X[:, j]), 1, len(levels) - 1) if len(levels) > 1 else 0
+                left = np.maximum(right - 1, 0)
+                nearer = np.abs(X[:, j] - levels[left]) <= np.abs(X[:, j] - levels[right])
+                X[:, j] = np.where(nearer, levels[left], levels[right])
+        return X
+
+    def distance(self, candidates, queries):
+        """MAD-normalised L1 distance for continuous features, mismatch count for categorical ones."""
+        continuous = np.array([f in self.continuous for f in self.features])
+        diff = np.abs(candidates - queries)
+        diff[:, ~continuous] = diff[:, ~continuous] > 0
+        return (diff * self.scales()).sum(axis=1) / len(self.features)
+
+
+class CounterfactualEngine:
+    def __init__(self, predict_fn, space, immutable=(), max_changes=3, n_samples=500,
+                 max_rounds=4, threshold=0.5, seed=None):
+        """
+        Args:
+            predict_fn (callable): float matrix -> probability of class 1.
+            space (FeatureSpace): feature metadata.
+            immutable (iterable): features a counterfactual may not change.
+            max_changes (int): at most this many features changed per candidate.
+            n_samples (int): candidates per query in the first round.
+            max_rounds (int): rounds for queries that are still short of counterfactuals.
+            threshold (float): decision threshold of the model.
+            seed (int): random seed.
+        """
+        self.predict_fn = predict_fn
+        self.space = space
+        self.mutable = np.array([f not in set(immutable) for f in space.features])
+        self.max_changes = max_changes
+        self.n_samples = n_samples
+        self.max_rounds = max_rounds
+        self.threshold = threshold
+        self.seed = seed
+
+    def _candidates(self, queries, n, rng):
+        """``n`` perturbations of every query, changing 1..max_changes mutable features."""
+        Q, m = queries.shape
+        candidates = np.repeat(queries, n, axis=0)
+        mutable = np.flatnonzero(self.mutable)
+        n_changes = rng.integers(1, min(self.max_changes, len(mutable)) + 1, size=Q * n)
+        # a random permutation of the mutable features per row, first n_changes are changed
+        keys = rng.random((Q * n, len(mutable)))
+        ranks = keys.argsort(axis=1).argsort(axis=1)
+        change = np.zeros((Q * n, m), dtype=bool)
+        change[:, mutable] = ranks < n_changes[:, None]
+        values = self.space.sample_values(Q * n, rng)
+        candidates[change] = values[change]
+        return candidates
+
+    def _generate(self, queries, total_cfs, desired, rng):
+        Q = len(queries)
+        original = (self.predict_fn(queries) >= self.threshold).astype(int)
+        target = 1 - original if desired == 'opposite' else np.full(Q, int(desired))
+        found = [[] for _ in range(Q)]
+        pending = np.arange(Q)
+        n = self.n_samples
+        for _ in range(self.max_rounds):
+            if len(pending) == 0:
+                break
+            candidates = self._candidates(queries[pending], n, rng)
+            proba = self.predict_fn(candidates)
+            owner = np.repeat(pending, n)
+            valid = (proba >= self.threshold).astype(int) == target[owner]
+            distance = self.space.distance(candidates, queries[owner])
+            for i, q in enumerate(pending):
+                rows = slice(i * n, (i + 1) * n)
+                keep = valid[rows]
+                found[q].append((candidates[rows][keep], distance[rows][keep], proba[rows][keep]))
+            counts = np.array([sum(len(c) for c, _, _ in found[q]) for q in range(Q)])
+            pending = np.flatnonzero(counts < total_cfs)
+            n *= 2
+        return [self._finalize(queries[q], found[q], total_cfs) for q in range(Q)], original
+
+    def _finalize(self, query, found, total_cfs):
+        if not found or not sum(len(c) for c, _, _ in found):
+            return np.empty((0, len(query))), np.empty(0), np.empty(0)
+        candidates = np.vstack([c for c, _, _ in found])
+        distance = np.concatenate([d for _, d, _ in found])
+        proba = np.concatenate([p for _, _, p in found])
+        order = np.argsort(distance, kind='stable')
+        candidates, distance, proba = candidates[order], distance[order], proba[order]
+        _, first = np.unique(candidates, axis=0, return_index=True)
+        keep = np.sort(first)
+        candidates, distance, proba = candidates[keep], distance[keep], proba[keep]
+
+        # diversity: one candidate per distinct set of changed features before repeating a set
+        changed = candidates != query
+        _, group_first = np.unique(changed, axis=0, return_index=True)
+        group_first = np.sort(group_first)
+        rest = np.setdiff1d(np.arange(len(candidates)), group_first, assume_unique=True)
+        chosen = np.concatenate([group_first, rest])[:total_cfs]
+        chosen = chosen[np.argsort(distance[chosen], kind='stable')]
+        return candidates[chosen], distance[chosen], proba[chosen]
+
+    def _frame(self, queries_index, results):
+        rows = []
+        for q, (candidates, distance, proba) in zip(queries_index, results):
+            for rank, (values, dist, p) in enumerate(zip(candidates, distance, proba)):
+                rows.append({'query': q, 'rank': rank, **dict(zip(self.space.features, values)),
+                             'probability': p, 'distance': dist})
+        columns = ['query', 'rank'] + self.space.features + ['probability', 'distance']
+        return pd.DataFrame(rows, columns=columns)
+
+    def generate(self, queries, total_cfs=4, desired_class='opposite', n_jobs=1, model_factory=None,
+                 chunk_size=256):
+        """Counterfactuals for every row of ``queries``.
+
+        Args:
+            queries (pd.DataFrame): applicants, with the columns of ``space.features``.
+            total_cfs (int): counterfactuals per query.
+            desired_class (str or int): ``'opposite'`` or the class to reach.
+            n_jobs (int): worker processes; needs ``model_factory`` when above 1.
+            model_factory (callable): picklable, returns a ``predict_fn`` in a worker.
+            chunk_size (int): queries per task.
+
+        Returns:
+            pd.DataFrame: one row per counterfactual with the query index, its
+            rank, the feature values, the predicted probability and the distance.
+        """
+        index = np.asarray(queries.index)
+        X = queries[self.space.features].to_numpy(dtype=float)
+        seeds = np.random.SeedSequence(self.seed).spawn(max(1, -(-len(X) // chunk_size)))
+        chunks = [(X[i:i + chunk_size], seed) for i, seed in zip(range(0, len(X), chunk_size), seeds)]
+
+        if n_jobs == 1 or model_factory is None:
+            outputs = [self._generate(x, total_cfs, desired_class, np.random.default_rng(s)) for x, s in chunks]
+        else:
+            params = dict(space=self.space, immutable=[f for f, m in zip(self.space.features, self.mutable) if not m],
+                          max_changes=self.max_changes, n_samples=self.n_samples,
+                          max_rounds=self.max_rounds, threshold=self.threshold)
+            # TensorFlow is not fork-safe: workers are spawned and load the model themselves
+            with ProcessPoolExecutor(n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(model_factory, params)) as pool:
+                outputs = list(pool.map(_worker_generate, [(x, total_cfs, desired_class, s) for x, s in chunks]))
+
+        results = [r for out, _ in outputs for r in out]
+        original = np.concatenate([o for _, o in outputs]) if outputs else np.empty(0, dtype=int)
+        frame = self._frame(index, results)
+        frame.attrs['original_class'] = dict(zip(index.tolist(), original.tolist()))
+        return frame
+
+
+_worker_engine = None
+
+
+def _init_worker(model_factory, params):
+    global _worker_engine
+    _worker_engine = CounterfactualEngine(model_factory(), **params)
+
+
+def _worker_generate(args):
+    X, total_cfs, desired_class, seed = args
+    return _worker_engine._generate(X, total_cfs, desired_class, np.random.default_rng(seed))
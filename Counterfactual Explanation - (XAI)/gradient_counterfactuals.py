@@ -0,0 +1,178 @@
+"""Gradient-based counterfactuals for the differentiable loan model.
+
+``feedforward_nn`` is a Keras network, so counterfactuals can be optimised
+directly instead of searched for. ``GradientCounterfactuals`` optimises
+``total_cfs`` candidates for every query of a batch at once, all inside one
+``tf.GradientTape`` step:
+
+    loss = hinge(target, logit) + proximity * L1 + sparsity * L0-surrogate
+           - diversity * mean pairwise distance between a query's candidates
+
+The candidates are parameterised as ``x = query + delta * unit`` with ``unit``
+the MAD of continuous features (1 for categorical ones), so one unit of
+``delta`` costs the same in every feature. The constraints are vectors applied
+to the whole batch after every step:
+
+* immutable features (e.g. the masked ``variable_to_mask_index`` column) have
+  a zero entry in the ``mutable`` mask, so their ``delta`` stays 0,
+* feature ranges are a projection of ``x`` onto ``[low, high]``.
+
+Categorical features are relaxed to reals during the optimisation and snapped
+to the nearest level at the end; the snapped candidates are predicted once more
+and only those that still reach the desired class are returned.
+
+The optimisation loop is one ``tf.function`` traced once in ``__init__`` with
+an ``input_signature`` whose batch dimension is ``None``, so batches of any
+size reuse the same graph. Keras optimisers need fully-defined variable
+shapes, so the Adam moments are passed in and out of the loop as tensors and
+start from zero for every batch.
+"""
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+
+class GradientCounterfactuals:
+    def __init__(self, model, space, immutable=(), proximity_weight=0.5, sparsity_weight=0.1,
+                 diversity_weight=0.1, margin=0.5, learning_rate=0.05, max_iter=500, check_every=50,
+                 threshold=0.5, seed=None):
+        """
+        Args:
+            model (tf.keras.Model): differentiable model returning the probability of class 1.
+            space (counterfactuals.FeatureSpace): feature ranges and levels.
+            immutable (iterable): features a counterfactual may not change.
+            proximity_weight (float): weight of the MAD-normalised L1 distance.
+            sparsity_weight (float): weight of the smooth count of changed features.
+            diversity_weight (float): reward for spreading a query's candidates apart.
+            margin (float): logit margin beyond the decision threshold.
+            learning_rate (float): Adam step size, in MAD units.
+            max_iter (int): optimisation steps per batch.
+            check_every (int): steps between checks for early stopping.
+            threshold (float): decision threshold of the model.
+            seed (int): seed of the random initialisation.
+        """
+        self.model = model
+        self.space = space
+        self.proximity_weight = proximity_weight
+        self.sparsity_weight = sparsity_weight
+        self.diversity_weight = diversity_weight
+        self.margin = margin
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.check_every = check_every
+        self.threshold = threshold
+        self.seed = seed
+
+        features = space.features
+        self.mutable = np.array([f not in set(immutable) for f in features], dtype=np.float32)
+        self.unit = np.array([space.mad[f] if f in space.continuous else 1.0 for f in features], dtype=np.float32)
+        self.low = np.array([space.low[f] if f in space.continuous else min(space.categories[f])
+                             for f in features], dtype=np.float32)
+        self.high = np.array([space.high[f] if f in space.continuous else max(space.categories[f])
+                              for f in features], dtype=np.float32)
+        self._threshold_logit = float(np.log(threshold) - np.log1p(-threshold))
+
+        rows = tf.TensorSpec([None, len(features)], tf.float32)
+        self._run = tf.function(self._steps, input_signature=[
+            rows, tf.TensorSpec([None], tf.float32), tf.TensorSpec([], tf.int32),
+            rows, rows, rows, tf.TensorSpec([], tf.float32), tf.TensorSpec([], tf.int32)])
+
+    def _proba(self, X, batch_size=8192):
+        # a direct call avoids the per-call setup of ``predict`` for small batches
+        if len(X) <= batch_size:
+            return self.model(X, training=False).numpy().ravel()
+        return self.model.predict(X, batch_size=batch_size, verbose=0).ravel()
+
+    def _losses(self, x, delta, sign, total_cfs):
+        p = tf.clip_by_value(tf.reshape(self.model(x, training=False), [-1]), 1e-6, 1 - 1e-6)
+        logit = tf.math.log(p) - tf.math.log1p(-p)
+        validity = tf.nn.relu(self.margin - sign * (logit - self._threshold_logit))
+        change = tf.abs(delta)
+        proximity = tf.reduce_mean(change, axis=1)
+        sparsity = tf.reduce_mean(tf.tanh(change / 0.1), axis=1)
+        grouped = tf.reshape(delta, [-1, total_cfs, delta.shape[1]])
+        pairwise = tf.reduce_mean(tf.abs(grouped[:, :, None, :] - grouped[:, None, :, :]), axis=[2, 3])
+        return validity, validity + self.proximity_weight * proximity + self.sparsity_weight * sparsity \
+            - self.diversity_weight * tf.reshape(pairwise, [-1])
+
+    def _steps(self, q, sign, total_cfs, delta, m, v, t, n_steps):
+        """``n_steps`` Adam steps from ``(delta, m, v, t)``; returns the new state and the worst validity."""
+        mutable, unit = tf.constant(self.mutable), tf.constant(self.unit)
+        low, high = tf.constant(self.low), tf.constant(self.high)
+        beta_1, beta_2, epsilon = 0.9, 0.999, 1e-7
+        worst = tf.constant(np.inf, tf.float32)
+        for _ in tf.range(n_steps):
+            with tf.GradientTape() as tape:
+                tape.watch(delta)
+                validity, loss = self._losses(q + delta * unit, delta, sign, total_cfs)
+                total = tf.reduce_sum(loss)
+            grad = tape.gradient(total, delta) * mutable
+            t += 1.0
+            m = beta_1 * m + (1 - beta_1) * grad
+            v = beta_2 * v + (1 - beta_2) * tf.square(grad)
+            step = self.learning_rate * tf.sqrt(1 - beta_2 ** t) / (1 - beta_1 ** t)
+            delta = delta - step * m / (tf.sqrt(v) + epsilon)
+            # project onto the feature ranges; immutable features stay at the query value
+            x = tf.clip_by_value(q + delta * unit, low, high)
+            delta = (x - q) / unit * mutable
+            worst = tf.reduce_max(validity)
+        return delta, m, v, t, worst
+
+    def _optimise(self, queries, target, total_cfs, rng):
+        q = tf.constant(np.repeat(queries, total_cfs, axis=0), dtype=tf.float32)
+        sign = tf.constant(np.repeat(2.0 * target - 1.0, total_cfs), dtype=tf.float32)
+        delta = tf.constant(rng.normal(0.0, 0.1, size=q.shape).astype(np.float32) * self.mutable)
+        # fresh optimiser state for every batch
+        m, v, t = tf.zeros_like(delta), tf.zeros_like(delta), tf.constant(0.0)
+        done = 0
+        while done < self.max_iter:
+            n_steps = min(self.check_every, self.max_iter - done)
+            delta, m, v, t, worst = self._run(q, sign, tf.constant(total_cfs), delta, m, v, t, tf.constant(n_steps))
+            done += n_steps
+            if float(worst) == 0.0:
+                break
+        return (q + delta * self.unit).numpy()
+
+    def generate(self, queries, total_cfs=4, desired_class='opposite', batch_size=1024):
+        """Counterfactuals for every row of ``queries``.
+
+        Args:
+            queries (pd.DataFrame): applicants, with the columns of ``space.features``.
+            total_cfs (int): candidates optimised per query.
+            desired_class (str or int): ``'opposite'`` or the class to reach.
+            batch_size (int): queries optimised together.
+
+        Returns:
+            pd.DataFrame: like ``CounterfactualEngine.generate``, valid distinct
+            counterfactuals only.
+        """
+        rng = np.random.default_rng(self.seed)
+        index = np.asarray(queries.index)
+        X = queries[self.space.features].to_numpy(dtype=np.float32)
+        original = (self._proba(X) >= self.threshold).astype(int)
+        target = 1 - original if desired_class == 'opposite' else np.full(len(X), int(desired_class))
+
+        frames = []
+        for start in range(0, len(X), batch_size):
+            stop = start + batch_size
+            candidates = self.space.snap(self._optimise(X[start:stop], target[start:stop], total_cfs, rng))
+            owner = np.repeat(np.arange(start, min(stop, len(X))), total_cfs)
+            proba = self._proba(candidates.astype(np.float32))
+            valid = (proba >= self.threshold).astype(int) == target[owner]
+            frame = pd.DataFrame(candidates[valid], columns=self.space.features)
+            frame.insert(0, 'query', index[owner[valid]])
+            frame['probability'] = proba[valid]
+            frame['distance'] = self.space.distance(candidates[valid], X[owner[valid]])
+            frames.append(frame)
+
+        columns = ['query', 'rank'] + self.space.features + ['probability', 'distance']
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        result = pd.concat(frames, ignore_index=True)
+        result = result.drop_duplicates(['query'] + self.space.features)
+        result = result.sort_values(['query', 'distance'], kind='stable')
+        result['rank'] = result.groupby('query').cumcount()
+        result = result[columns].reset_index(drop=True)
+        result.attrs['original_class'] = dict(zip(index.tolist(), original.tolist()))
+        return result
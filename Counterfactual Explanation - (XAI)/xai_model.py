@@ -0,0 +1,44 @@
+"""The confounder-masked loan model of the XAI notebook.
+
+``mask_input`` and ``feedforward_nn`` were defined in a notebook cell. They live
+here so that worker processes (batched counterfactual search) can rebuild the
+network from saved weights; a Keras model with a ``Lambda`` layer does not
+pickle.
+"""
+
+import tensorflow as tf
+
+
+def mask_input(X, num_features, variable_to_mask):
+    mask = tf.concat([
+        tf.ones((tf.shape(X)[0], variable_to_mask)),
+        tf.zeros((tf.shape(X)[0], 1)),
+        tf.ones((tf.shape(X)[0], num_features - variable_to_mask - 1))
+    ], axis=1)
+    return tf.multiply(X, mask)
+
+
+def feedforward_nn(input_shape, num_features, variable_to_mask):
+    model = tf.keras.Sequential([
+        tf.keras.layers.Lambda(lambda x: mask_input(x, num_features, variable_to_mask), input_shape=input_shape),
+        tf.keras.layers.Dense(64, activation='relu'),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(9, activation='relu'),
+        tf.keras.layers.Dense(3, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+    return model
+
+
+def keras_predict_fn(model, batch_size=8192):
+    """Probability of the positive class for a float matrix, in large batches."""
+    def predict(X):
+        return model.predict(tf.convert_to_tensor(X, dtype=tf.float32), batch_size=batch_size, verbose=0).ravel()
+    return predict
+
+
+def load_predict_fn(weights_path, num_features, variable_to_mask, batch_size=8192):
+    """Rebuild ``feedforward_nn`` from saved weights; picklable through ``functools.partial``."""
+    model = feedforward_nn(input_shape=(num_features,), num_features=num_features, variable_to_mask=variable_to_mask)
+    model.load_weights(weights_path)
+    return keras_predict_fn(model, batch_size)
@@ -0,0 +1,202 @@
+"""Persistent FAISS index for the PDF chatbot.
+
+``Embedding`` loaded every PDF, split it with ``RecursiveCharacterTextSplitter``
+and embedded every chunk into a new in-memory ``FAISS`` store on every
+session. ``PersistentIndex`` keeps the store on disk instead:
+
+* every PDF is identified by the SHA-256 of its bytes. ``manifest.json``
+  maps each content hash to its source path and the ids of its chunks,
+* ``sync(pdf_paths)`` hashes the files (on a thread pool) and only loads,
+  splits and embeds the ones whose hash is new. Chunks of documents that are
+  no longer listed, or whose content changed, are removed by id
+  (``IndexIDMap2``). A renamed file with unchanged content is not re-embedded,
+* the vectors are saved with ``faiss.write_index``, and the chunk texts and
+  metadata go to ``docstore.json``. An update writes the index, docstore and
+  manifest into a new generation directory (``gen-<n>``), then points
+  ``CURRENT`` at it with a single rename. An interrupted update leaves the
+  previous generation intact, including the manifest's ``next_id``, so the
+  three files never go out of sync,
+* when nothing changed the index is opened with ``IO_FLAG_MMAP_IFC`` and
+  ``IO_FLAG_READ_ONLY``, which maps the flat vectors instead of reading them
+  (plain ``IO_FLAG_MMAP`` does not apply to ``IndexFlat``), so start-up costs
+  a file map instead of an embedding pass.
+
+``sync`` returns a LangChain ``FAISS`` vectorstore, a drop-in for
+``FAISS.from_documents(...)`` in ``Chain``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.vectorstores import FAISS
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _dump_json(obj, path):
+    with open(path, 'w') as f:
+        json.dump(obj, f)
+
+
+def _write_atomic(path, write):
+    tmp = f'{path}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class PersistentIndex:
+    def __init__(self, directory, embedding, chunk_size=1135, chunk_overlap=100,
+                 separators=('\n\n', '\n', '.', ';', ',', ' ', '', '..'), n_jobs=8):
+        """
+        Args:
+            directory (str): where the index, docstore and manifest are kept.
+            embedding: LangChain embeddings, e.g. ``OpenAIEmbeddings()``.
+            chunk_size, chunk_overlap, separators: ``RecursiveCharacterTextSplitter`` settings.
+            n_jobs (int): threads hashing the PDFs.
+        """
+        self.directory = directory
+        self.embedding = embedding
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+            separators=list(separators),
+        )
+        self.n_jobs = n_jobs
+        os.makedirs(directory, exist_ok=True)
+        self.generation = None
+
+    def _read_generation(self):
+        """Generation ``CURRENT`` points at, ``None`` before the first update."""
+        path = os.path.join(self.directory, 'CURRENT')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['generation']
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.directory, f'gen-{generation}')
+
+    def _path(self, name, generation=None):
+        return os.path.join(self._generation_dir(self.generation if generation is None else generation), name)
+
+    def _read_manifest(self):
+        if self.generation is None:
+            return {'documents': {}, 'next_id': 0}
+        with open(self._path('manifest.json')) as f:
+            return json.load(f)
+
+    def _read_docstore(self):
+        if self.generation is None:
+            return {}
+        with open(self._path('docstore.json')) as f:
+            return json.load(f)
+
+    def _read_index(self, mmap):
+        if self.generation is None or not os.path.exists(self._path('faiss.index')):
+            return None
+        flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        return faiss.read_index(self._path('faiss.index'), flags)
+
+    def _commit(self, index, docstore, manifest):
+        """Write a new generation and switch ``CURRENT`` to it with one rename."""
+        generation = 0 if self.generation is None else self.generation + 1
+        directory = self._generation_dir(generation)
+        # leftovers of an update interrupted before its switch
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        if index is not None:
+            faiss.write_index(index, self._path('faiss.index', generation))
+        _dump_json(docstore, self._path('docstore.json', generation))
+        _dump_json(manifest, self._path('manifest.json', generation))
+        _write_atomic(os.path.join(self.directory, 'CURRENT'), lambda p: _dump_json({'generation': generation}, p))
+        # keep the previous generation for readers that resolved CURRENT just before the switch
+        for name in os.listdir(self.directory):
+            if name.startswith('gen-') and name[4:].isdigit() and int(name[4:]) < generation - 1:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        self.generation = generation
+
+    def _split(self, path):
+        pages = PyPDFLoader(path).load_and_split()
+        return self.splitter.split_documents(pages)
+
+    def sync(self, pdf_paths, prune=True):
+        """Bring the index up to date with ``pdf_paths`` and return the vectorstore.
+
+        Args:
+            pdf_paths (list): PDFs that should be searchable.
+            prune (bool): drop documents whose path is no longer in ``pdf_paths``.
+                The old chunks of a listed path whose content changed are
+                dropped either way.
+        """
+        with ThreadPoolExecutor(self.n_jobs) as pool:
+            hashes = dict(zip(pool.map(file_hash, pdf_paths), pdf_paths))
+
+        self.generation = self._read_generation()
+        manifest = self._read_manifest()
+        documents = manifest['documents']
+        new = [h for h in hashes if h not in documents]
+        # a listed path whose content changed always drops its old chunks; prune
+        # only decides about documents whose path is no longer listed
+        listed = set(hashes.values())
+        stale = [h for h in documents if h not in hashes and (prune or documents[h]['source'] in listed)]
+        renamed = [h for h in hashes if h in documents and documents[h]['source'] != hashes[h]]
+
+        if not new and not stale and not renamed:
+            return self._vectorstore(self._read_index(mmap=True), self._read_docstore())
+
+        index = self._read_index(mmap=False)
+        docstore = self._read_docstore()
+
+        removed = [i for h in stale for i in documents.pop(h)['ids']]
+        if removed and index is not None:
+            index.remove_ids(np.asarray(removed, dtype=np.int64))
+            for i in removed:
+                docstore.pop(str(i), None)
+
+        for h in renamed:
+            documents[h]['source'] = hashes[h]
+            for i in documents[h]['ids']:
+                docstore[str(i)]['metadata']['source'] = hashes[h]
+
+        for h in new:
+            chunks = self._split(hashes[h])
+            if not chunks:
+                documents[h] = {'source': hashes[h], 'ids': []}
+                continue
+            vectors = np.asarray(self.embedding.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+            if index is None:
+                index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+            ids = np.arange(manifest['next_id'], manifest['next_id'] + len(chunks), dtype=np.int64)
+            index.add_with_ids(vectors, ids)
+            manifest['next_id'] += len(chunks)
+            documents[h] = {'source': hashes[h], 'ids': ids.tolist()}
+            for i, chunk in zip(ids.tolist(), chunks):
+                docstore[str(i)] = {'page_content': chunk.page_content, 'metadata': chunk.metadata}
+
+        self._commit(index, docstore, manifest)
+        return self._vectorstore(index, docstore)
+
+    def _vectorstore(self, index, docstore):
+        if index is None:
+            raise ValueError(f'no documents indexed in {self.directory}')
+        store = InMemoryDocstore({i: Document(page_content=d['page_content'], metadata=d['metadata'])
+                                  for i, d in docstore.items()})
+        # IndexIDMap2 returns the stable chunk ids, which are also the docstore keys
+        return FAISS(self.embedding, index, store, {int(i): i for i in docstore})
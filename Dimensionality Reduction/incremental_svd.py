@@ -0,0 +1,218 @@
+"""Single-pass, out-of-core SVD of a standardised feature matrix.
+
+The notebook reads ``data.csv`` whole, standardises it with ``StandardScaler``
+and concatenates it into a second DataFrame before decomposing it, so the
+matrix is held in memory two or three times. ``IncrementalSVD`` reads row
+chunks once and keeps a rank-``k`` SVD up to date with Brand's update:
+
+* column means and variances are merged chunk by chunk (Chan et al.), and each
+  chunk is pre-standardised with the statistics of the first chunk, so the
+  updates already see a well-scaled matrix,
+* appending a chunk ``C`` to ``U S V^T`` only needs the ``(k + b) x (k + m)``
+  core ``[[S, 0], [C V, H^T]]`` where ``H`` is the part of ``C`` outside the
+  span of ``V``; its SVD gives the new ``S`` and ``V`` and a ``k x k`` rotation
+  of the previous rows of ``U``,
+* rows of ``U`` are never rotated while streaming: each chunk's rows are
+  appended to a scratch file together with the rotation at that time, and
+  the final ``U`` is written in one backward pass,
+* once all rows are seen, the difference between the first-chunk statistics
+  and the exact ones is applied as a rank-one centring update plus a column
+  rescaling, both on ``(k + 1) x (k + 1)`` matrices.
+
+Memory is ``O(chunksize * m + m * k)``; ``U`` (``n x k``), ``S`` and ``VT`` are
+written as ``.npy`` files and opened memory-mapped.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+EPS = 1e-12
+
+
+class RunningMoments:
+    """Column means and variances merged chunk by chunk."""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, chunk):
+        b = len(chunk)
+        if b == 0:
+            return
+        mean = chunk.mean(axis=0)
+        m2 = ((chunk - mean) ** 2).sum(axis=0)
+        delta = mean - self.mean
+        total = self.n + b
+        self.mean = self.mean + delta * b / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * b / total
+        self.n = total
+
+    @property
+    def var(self):
+        return self.m2 / max(self.n, 1)
+
+    @property
+    def scale(self):
+        # constant columns keep a unit scale, like StandardScaler
+        std = np.sqrt(self.var)
+        return np.where(std > EPS, std, 1.0)
+
+
+class IncrementalSVD:
+    def __init__(self, k, directory):
+        """Rank-``k`` SVD of the standardised rows passed to ``partial_fit``.
+
+        Args:
+            k (int): number of components kept.
+            directory (str): where ``U.npy``, ``S.npy``, ``VT.npy``, ``mean.npy``
+                and ``scale.npy`` are written.
+        """
+        self.k = k
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._scratch_path = os.path.join(directory, 'U.scratch')
+        self._scratch = open(self._scratch_path, 'wb')
+        self.moments = None
+        self.n_rows = 0
+
+    def partial_fit(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        if self.moments is None:
+            m = chunk.shape[1]
+            self.moments = RunningMoments(m)
+            self.moments.update(chunk)
+            # reference statistics the streamed rows are standardised with
+            self.mean0, self.scale0 = self.moments.mean.copy(), self.moments.scale.copy()
+            self.S, self.V = np.zeros(self.k), np.zeros((m, self.k))
+            self.rotations, self.block_sums, self.block_rows = [], [], []
+        else:
+            self.moments.update(chunk)
+        C = (chunk - self.mean0) / self.scale0
+
+        k = self.k
+        L = C @ self.V
+        J, Kt = np.linalg.qr((C - L @ self.V.T).T)
+        core = np.zeros((k + len(C), k + J.shape[1]))
+        core[:k, :k] = np.diag(self.S)
+        core[k:, :k] = L
+        core[k:, k:] = Kt.T
+        Um, Sm, VmT = np.linalg.svd(core, full_matrices=False)
+
+        # early chunks may have fewer than k components: pad with zeros
+        q = min(k, len(Sm))
+        V = np.zeros_like(self.V)
+        V[:, :q] = np.hstack([self.V, J]) @ VmT[:q].T
+        self.S = np.zeros(k)
+        self.S[:q] = Sm[:q]
+        self.V = V
+        rotation = np.zeros((k, k))
+        rotation[:, :q] = Um[:k, :q]
+        rows = np.zeros((len(C), k))
+        rows[:, :q] = Um[k:, :q]
+
+        # previous rows of U are rotated by `rotation`; the new rows are stored as they are
+        self.rotations.append(rotation)
+        self.block_sums.append(rows.sum(axis=0))
+        self.block_rows.append(len(C))
+        self._scratch.write(np.ascontiguousarray(rows).tobytes())
+        self.n_rows += len(C)
+        return self
+
+    def _correction(self, u_sum):
+        """Map ``[U_stream, P]`` to the exactly standardised ``U``, and the new ``S`` and ``VT``.
+
+        With ``b = (mean0 - mean) / scale0`` and ``E = diag(scale0 / scale)`` the
+        standardised matrix is ``(U S V^T + 1 b^T) E``.
+        """
+        k, n = self.k, self.n_rows
+        b = (self.mean0 - self.moments.mean) / self.scale0
+        E = self.scale0 / self.moments.scale
+
+        # rank-one update U S V^T + 1 b^T (Brand); 1 = U u_sum + Ra * P
+        Ra = np.sqrt(max(n - u_sum @ u_sum, 0.0))
+        nb = self.V.T @ b
+        q = b - self.V @ nb
+        Rb = np.linalg.norm(q)
+        Q = q / Rb if Rb > EPS else np.zeros_like(q)
+        K = np.zeros((k + 1, k + 1))
+        K[:k, :k] = np.diag(self.S)
+        K += np.outer(np.append(u_sum, Ra), np.append(nb, Rb))
+
+        # column rescaling: E [V Q] = Qv Rv
+        Qv, Rv = np.linalg.qr(E[:, None] * np.hstack([self.V, Q[:, None]]))
+        Uk, Sk, VkT = np.linalg.svd(K @ Rv.T)
+        G = Uk[:, :k]
+        VT = (Qv @ VkT[:k].T).T
+        P_scale = 1.0 / Ra if Ra > EPS else 0.0
+        return G, Sk[:k], VT, P_scale
+
+    def finalize(self, block_size=100000):
+        """Write ``U``, ``S`` and ``VT`` and return them, ``U`` memory-mapped."""
+        self._scratch.close()
+        k = self.k
+        # accumulated rotation applied to each block after it was appended
+        after = [np.eye(k)]
+        for rotation in reversed(self.rotations[1:]):
+            after.append(rotation @ after[-1])
+        after = after[::-1]
+        u_sum = sum(s @ a for s, a in zip(self.block_sums, after))
+        G, S, VT, P_scale = self._correction(u_sum)
+
+        rows = np.memmap(self._scratch_path, dtype=float, mode='r', shape=(self.n_rows, k))
+        U = np.lib.format.open_memmap(os.path.join(self.directory, 'U.npy'), mode='w+',
+                                      shape=(self.n_rows, k))
+        start = 0
+        for n_block, a in zip(self.block_rows, after):
+            for lo in range(start, start + n_block, block_size):
+                hi = min(lo + block_size, start + n_block)
+                U_stream = rows[lo:hi] @ a
+                P = (1.0 - U_stream @ u_sum) * P_scale
+                U[lo:hi] = U_stream @ G[:k] + np.outer(P, G[k])
+            start += n_block
+        U.flush()
+        del rows
+        os.remove(self._scratch_path)
+
+        np.save(os.path.join(self.directory, 'S.npy'), S)
+        np.save(os.path.join(self.directory, 'VT.npy'), VT)
+        np.save(os.path.join(self.directory, 'mean.npy'), self.moments.mean)
+        np.save(os.path.join(self.directory, 'scale.npy'), self.moments.scale)
+        return load_svd(self.directory)
+
+
+def iter_feature_chunks(source, chunksize=10000, label='Class'):
+    """Float feature chunks of a CSV path or an array, without the label column."""
+    if isinstance(source, (str, os.PathLike)):
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            yield chunk.drop(columns=[label], errors='ignore').to_numpy(dtype=float)
+    else:
+        for start in range(0, len(source), chunksize):
+            yield np.asarray(source[start:start + chunksize], dtype=float)
+
+
+def incremental_svd(source, k, directory, chunksize=10000, label='Class'):
+    """Rank-``k`` SVD of the standardised features of ``source`` in one pass.
+
+    Args:
+        source (str or np.ndarray): CSV path (read in chunks) or array-like rows.
+        k (int): number of components.
+        directory (str): output directory of the ``.npy`` files.
+        chunksize (int): rows per update.
+        label (str): label column excluded from the features.
+
+    Returns:
+        tuple: ``(U, S, VT)``, ``U`` memory-mapped from ``directory``.
+    """
+    svd = IncrementalSVD(k, directory)
+    for chunk in iter_feature_chunks(source, chunksize, label):
+        svd.partial_fit(chunk)
+    return svd.finalize()
+
+
+def load_svd(directory, mmap_mode='r'):
+    return tuple(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                 for name in ('U', 'S', 'VT'))
@@ -0,0 +1,124 @@
+"""Projection onto the leading singular vectors.
+
+The notebook projected every row with ``for i, row in fl.iterrows()`` and three
+``VT[k, :] @ row.values.T`` products per row, plus one ``ax.scatter`` call per
+point. ``SVDProjector`` keeps the components together with the standardisation
+and folds both into one ``m x k`` matrix ``W = (VT / scale).T`` and an offset
+``mean @ W``, so projecting any batch of raw rows is one matrix multiply:
+
+    X @ W - offset == ((X - mean) / scale) @ VT.T
+
+``transform_stream`` applies it chunk by chunk to files larger than memory and
+``save`` / ``load`` persist the components for inference.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental_svd import iter_feature_chunks
+from truncated_svd import feature_matrix, truncated_svd
+
+
+def _load(directory, name):
+    path = os.path.join(directory, f'{name}.npy')
+    return np.load(path) if os.path.exists(path) else None
+
+
+class SVDProjector:
+    def __init__(self, n_components=None, target=0.9, method='randomized', standardize=True,
+                 label='Class', seed=None):
+        """
+        Args:
+            n_components (int): components kept; chosen from ``target`` when ``None``.
+            target (float): explained-variance target for the automatic choice.
+            method (str): ``truncated_svd`` solver.
+            standardize (bool): centre and scale the features before the SVD.
+            label (str): label column ignored in DataFrames.
+            seed (int): random seed of the solver.
+        """
+        self.n_components = n_components
+        self.target = target
+        self.method = method
+        self.standardize = standardize
+        self.label = label
+        self.seed = seed
+
+    def _set(self, components, columns, mean, scale, singular_values=None):
+        self.components_ = np.asarray(components, dtype=float)
+        m = self.components_.shape[1]
+        self.columns = list(columns) if columns is not None else None
+        self.mean_ = np.zeros(m) if mean is None else np.asarray(mean, dtype=float)
+        self.scale_ = np.ones(m) if scale is None else np.asarray(scale, dtype=float)
+        self.singular_values_ = None if singular_values is None else np.asarray(singular_values)
+        self.weights_ = np.ascontiguousarray((self.components_ / self.scale_).T)
+        self.offset_ = self.mean_ @ self.weights_
+        return self
+
+    @classmethod
+    def from_components(cls, components, columns=None, mean=None, scale=None, singular_values=None):
+        """Projector for components computed elsewhere (e.g. ``VT[:3]``)."""
+        return cls(n_components=len(components), standardize=mean is not None)._set(
+            components, columns, mean, scale, singular_values)
+
+    @classmethod
+    def from_incremental(cls, directory, n_components=None):
+        """Projector for the output directory of ``incremental_svd``."""
+        VT, S = _load(directory, 'VT')[:n_components], _load(directory, 'S')[:n_components]
+        return cls(n_components=len(VT))._set(VT, None, _load(directory, 'mean'), _load(directory, 'scale'), S)
+
+    def _matrix(self, X):
+        if isinstance(X, pd.DataFrame):
+            if self.columns is not None:
+                return X[self.columns].to_numpy(dtype=float)
+            return feature_matrix(X, self.label)[0]
+        return np.asarray(X, dtype=float)
+
+    def fit(self, X):
+        if isinstance(X, pd.DataFrame):
+            X, columns, _ = feature_matrix(X, self.label)
+        else:
+            X, columns = np.asarray(X, dtype=float), None
+        mean, scale = None, None
+        if self.standardize:
+            mean, std = X.mean(axis=0), X.std(axis=0)
+            scale = np.where(std > 0, std, 1.0)
+            X = (X - mean) / scale
+        _, S, VT = truncated_svd(X, k=self.n_components, target=self.target, method=self.method, seed=self.seed)
+        return self._set(VT, columns, mean, scale, S)
+
+    def transform(self, X):
+        """Coordinates of the rows of ``X`` on the components, ``n x k``."""
+        return self._matrix(X) @ self.weights_ - self.offset_
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def transform_stream(self, source, chunksize=10000):
+        """Yield the projection of a CSV path or array, ``chunksize`` rows at a time."""
+        if isinstance(source, (str, os.PathLike)):
+            for chunk in pd.read_csv(source, chunksize=chunksize):
+                yield self.transform(chunk)
+        else:
+            for chunk in iter_feature_chunks(source, chunksize, self.label):
+                yield self.transform(chunk)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'components.npy'), self.components_)
+        np.save(os.path.join(directory, 'mean.npy'), self.mean_)
+        np.save(os.path.join(directory, 'scale.npy'), self.scale_)
+        if self.singular_values_ is not None:
+            np.save(os.path.join(directory, 'singular_values.npy'), self.singular_values_)
+        with open(os.path.join(directory, 'projector.json'), 'w') as f:
+            json.dump({'columns': self.columns, 'label': self.label, 'standardize': self.standardize}, f)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'projector.json')) as f:
+            meta = json.load(f)
+        projector = cls(standardize=meta['standardize'], label=meta['label'])
+        return projector._set(_load(directory, 'components'), meta['columns'], _load(directory, 'mean'),
+                              _load(directory, 'scale'), _load(directory, 'singular_values'))
@@ -0,0 +1,102 @@
+"""Low-rank reconstruction error and per-row residual scores.
+
+The notebook measured the rank-``pc`` approximation with
+``np.linalg.norm(fl - X_app) / np.linalg.norm(fl)``, which materialises the
+dense ``n x m`` reconstruction ``U[:, :pc] @ np.diag(S[:pc]) @ VT[:pc, :]``
+and a second ``n x m`` difference matrix.
+
+* For the SVD's own matrix the error follows from the singular values alone:
+  ``||X - X_k||_F**2 = ||X||_F**2 - sum(S[:k]**2)`` (Eckart-Young), so
+  ``relative_error_from_singular_values`` needs only ``S`` and the norm.
+* For any other rows (new data, a streamed file, a projector fitted
+  elsewhere) ``row_residual_norms`` works block by block: each block is
+  projected on ``VT`` and its residual norms are taken, so memory is
+  ``O(block_size * m)`` and no reconstruction of the full matrix is formed.
+
+The per-row residual norm is the distance of a row from the retained subspace,
+which ``outlier_scores`` exposes as an anomaly score: rows the leading
+components cannot explain (e.g. unusual molecules in the toxicity data) score
+high.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental_svd import iter_feature_chunks
+
+
+def relative_error_from_singular_values(S, k, total_norm2):
+    """Relative Frobenius error of the rank-``k`` truncation of the decomposed matrix.
+
+    Args:
+        S (np.ndarray): leading singular values (at least ``k``).
+        k (int): rank of the approximation.
+        total_norm2 (float): ``||X||_F**2``, e.g. ``np.sum(X ** 2)`` or the
+            streamed sum of squares.
+    """
+    residual = max(total_norm2 - np.sum(np.asarray(S[:k]) ** 2), 0.0)
+    return float(np.sqrt(residual / total_norm2))
+
+
+def _blocks(source, block_size, label):
+    if isinstance(source, (str, os.PathLike)):
+        yield from iter_feature_chunks(source, block_size, label)
+    elif isinstance(source, pd.DataFrame):
+        features = source.drop(columns=[label], errors='ignore')
+        for start in range(0, len(features), block_size):
+            yield features.iloc[start:start + block_size].to_numpy(dtype=float)
+    else:
+        for start in range(0, len(source), block_size):
+            yield np.asarray(source[start:start + block_size], dtype=float)
+
+
+def iter_residuals(source, VT, mean=None, scale=None, block_size=10000, label='Class'):
+    """Yield ``(residual_norm2, row_norm2)`` arrays block by block.
+
+    Rows are standardised with ``mean`` / ``scale`` first when they are given
+    (e.g. from an ``SVDProjector``).
+    """
+    VT = np.asarray(VT, dtype=float)
+    for block in _blocks(source, block_size, label):
+        if mean is not None:
+            block = (block - mean) / scale
+        residual = block - (block @ VT.T) @ VT
+        yield np.einsum('ij,ij->i', residual, residual), np.einsum('ij,ij->i', block, block)
+
+
+def row_residual_norms(source, VT, mean=None, scale=None, block_size=10000, label='Class'):
+    """Distance of every row from the span of ``VT``, computed in blocks."""
+    parts = [np.sqrt(r) for r, _ in iter_residuals(source, VT, mean, scale, block_size, label)]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def relative_error(source, VT, mean=None, scale=None, block_size=10000, label='Class'):
+    """``||X - X VT^T VT||_F / ||X||_F`` without forming the reconstruction."""
+    residual, total = 0.0, 0.0
+    for r, t in iter_residuals(source, VT, mean, scale, block_size, label):
+        residual += r.sum()
+        total += t.sum()
+    return float(np.sqrt(residual / total)) if total > 0 else 0.0
+
+
+def outlier_scores(source, projector, block_size=10000, relative=False, label='Class'):
+    """Per-row reconstruction error of the rows of ``source`` under an ``SVDProjector``.
+
+    Args:
+        relative (bool): divide by the norm of the standardised row, so scores
+            are comparable between rows of very different magnitude.
+    """
+    parts = []
+    for r, t in iter_residuals(source, projector.components_, projector.mean_, projector.scale_,
+                               block_size, label):
+        parts.append(np.sqrt(r / np.maximum(t, 1e-300)) if relative else np.sqrt(r))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def flag_outliers(scores, n_mad=3.5):
+    """Rows whose score exceeds the median by more than ``n_mad`` scaled MADs."""
+    median = np.median(scores)
+    mad = 1.4826 * np.median(np.abs(scores - median))
+    return scores > median + n_mad * mad
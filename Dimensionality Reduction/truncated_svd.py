@@ -0,0 +1,158 @@
+"""Truncated SVD for the dimensionality-reduction workflow.
+
+``Dimension_reduction.ipynb`` used ``np.linalg.svd(fl, full_matrices=0)`` on
+the whole standardised matrix, label column included, and then kept the first
+``pc`` components. A thin SVD of an ``n x m`` matrix costs ``O(n m min(n, m))``
+although only the leading ``k`` triplets are used.
+
+``truncated_svd`` computes the top ``k`` components only, with one of
+
+* ``'randomized'``: randomized range finder (Halko, Martinsson & Tropp) with
+  ``n_oversamples`` extra columns and ``n_iter`` QR-normalised power
+  iterations, ``O(n m k)``,
+* ``'lanczos'``: ARPACK's implicitly restarted Lanczos bidiagonalisation
+  (``scipy.sparse.linalg.svds``), the most accurate for small ``k``,
+* ``'full'``: LAPACK thin SVD, truncated; the reference.
+
+When ``k`` is not given it is the smallest rank whose explained variance
+``cumsum(S**2) / ||X||_F**2`` reaches ``target``. The squared Frobenius norm is
+the total variance of all components, so the ratio is exact even though only
+``k`` singular values are computed; ``k`` is grown by doubling until the target
+is reached. ``'full'`` decomposes once and cuts at the target rank, and the
+iterative solvers start every doubling from the previous triplets (``init``)
+instead of from scratch. Signs are fixed so that the largest entry of each left singular
+vector is positive, which makes the methods interchangeable.
+"""
+
+import numpy as np
+from scipy.sparse.linalg import svds
+
+
+def feature_matrix(df, label='Class'):
+    """Split a DataFrame into the float feature matrix, the feature names and the labels.
+
+    Returns:
+        tuple: ``(X, columns, y)``, ``y`` is ``None`` when there is no ``label`` column.
+    """
+    y = df[label].to_numpy() if label in df else None
+    features = df.drop(columns=[label]) if label in df else df
+    return features.to_numpy(dtype=float), list(features.columns), y
+
+
+def _flip_signs(U, VT):
+    signs = np.sign(U[np.abs(U).argmax(axis=0), np.arange(U.shape[1])])
+    signs[signs == 0] = 1
+    return U * signs, VT * signs[:, None]
+
+
+def _finish(U, S, VT):
+    U, VT = _flip_signs(U, VT)
+    return U, S, VT
+
+
+def full_svd(X, k, n_oversamples=10, n_iter=4, tol=0, seed=None, init=None):
+    """Top ``k`` singular triplets of a LAPACK thin SVD; the other arguments are ignored."""
+    U, S, VT = np.linalg.svd(X, full_matrices=False)
+    return U[:, :k], S[:k], VT[:k]
+
+
+def randomized_svd(X, k, n_oversamples=10, n_iter=4, tol=0, seed=None, init=None):
+    """Top ``k`` singular triplets from a randomized range finder; ``tol`` is ignored.
+
+    Args:
+        X (np.ndarray): ``n x m`` matrix.
+        k (int): number of components.
+        n_oversamples (int): extra random directions, improves the accuracy of the
+            trailing components.
+        n_iter (int): power iterations, needed when the spectrum decays slowly.
+        seed (int): random seed.
+        init (tuple): ``(U, S, VT)`` of a smaller ``k``; its right singular
+            vectors replace the first random directions.
+    """
+    rng = np.random.default_rng(seed)
+    p = min(k + n_oversamples, *X.shape)
+    omega = rng.standard_normal((X.shape[1], p))
+    if init is not None:
+        previous = init[2][:p].T
+        omega[:, :previous.shape[1]] = previous
+    Q, _ = np.linalg.qr(X @ omega)
+    for _ in range(n_iter):
+        # re-orthonormalise between the products so small singular values survive rounding
+        Z, _ = np.linalg.qr(X.T @ Q)
+        Q, _ = np.linalg.qr(X @ Z)
+    Ub, S, VT = np.linalg.svd(Q.T @ X, full_matrices=False)
+    return (Q @ Ub)[:, :k], S[:k], VT[:k]
+
+
+def lanczos_svd(X, k, n_oversamples=10, n_iter=4, tol=0, seed=None, init=None):
+    """Top ``k`` singular triplets by Lanczos bidiagonalisation (ARPACK).
+
+    ``tol`` is ARPACK's relative accuracy (0 is machine precision);
+    ``n_oversamples`` and ``n_iter`` are ignored. With ``init`` (``(U, S, VT)``
+    of a smaller ``k``) the start vector is weighted towards its singular
+    vectors.
+    """
+    if k >= min(X.shape):
+        return full_svd(X, k)
+    v0 = np.random.default_rng(seed).standard_normal(min(X.shape))
+    if init is not None:
+        # a start vector inside the previous subspace only would not reach the new directions
+        U, _, VT = init
+        basis = VT.T if X.shape[1] <= X.shape[0] else U
+        v0 = v0 / np.linalg.norm(v0) + basis.sum(axis=1) / np.sqrt(basis.shape[1])
+    U, S, VT = svds(X, k=k, tol=tol, v0=v0)
+    order = np.argsort(S)[::-1]
+    return U[:, order], S[order], VT[order]
+
+
+# every solver takes ``(X, k, n_oversamples, n_iter, tol, seed, init)`` and ignores what does not apply
+SOLVERS = {
+    'randomized': randomized_svd,
+    'lanczos': lanczos_svd,
+    'full': full_svd,
+}
+
+
+def explained_variance_ratio(S, total_variance):
+    """Share of ``total_variance`` (``||X||_F**2``) explained by each component."""
+    return S ** 2 / total_variance
+
+
+def rank_for_target(S, total_variance, target):
+    """Smallest number of components whose cumulative explained variance reaches ``target``."""
+    ratio = np.cumsum(explained_variance_ratio(S, total_variance))
+    return int(min(np.searchsorted(ratio, target - 1e-12) + 1, len(S)))
+
+
+def truncated_svd(X, k=None, target=0.9, method='randomized', k_init=32, **kwargs):
+    """Leading singular triplets of ``X``.
+
+    Args:
+        X (np.ndarray): ``n x m`` matrix, already standardised and without the label.
+        k (int): number of components; chosen from ``target`` when ``None``.
+        target (float): explained-variance target used when ``k`` is ``None``.
+        method (str): ``'randomized'``, ``'lanczos'`` or ``'full'``.
+        k_init (int): first rank tried when searching for ``k``.
+        **kwargs: solver options ``n_oversamples``, ``n_iter``, ``tol`` and ``seed``,
+            accepted by every method and ignored where they do not apply.
+
+    Returns:
+        tuple: ``(U, S, VT)`` with shapes ``(n, k)``, ``(k,)`` and ``(k, m)``.
+    """
+    X = np.asarray(X, dtype=float)
+    solve = SOLVERS[method]
+    rank = min(X.shape)
+    if k is not None:
+        return _finish(*solve(X, min(k, rank), **kwargs))
+
+    total_variance = np.einsum('ij,ij->', X, X)
+    # a full decomposition has every component already: decompose once and cut
+    k = rank if method == 'full' else min(k_init, rank)
+    previous = None
+    while True:
+        U, S, VT = solve(X, k, init=previous, **kwargs)
+        if np.sum(S ** 2) >= target * total_variance or k == rank:
+            n = rank_for_target(S, total_variance, target)
+            return _finish(U[:, :n], S[:n], VT[:n])
+        previous = U, S, VT
+        k = min(2 * k, rank)
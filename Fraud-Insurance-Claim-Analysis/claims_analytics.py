@@ -0,0 +1,128 @@
+"""Vectorised claim aggregations for the fraud analysis.
+
+``fraud_insurance_claim.py`` used to push every query through
+``pandasql.sqldf``, which copies the DataFrames into a new in-memory SQLite
+database per call, and every summary re-ran ``SELECT SUM(CLAIM_AMOUNT)`` and
+the denied-claim count as subqueries.
+
+``ClaimsAnalytics`` builds the joined claims table once, keeps the columns the
+summaries need as NumPy arrays, computes the shared totals once and answers
+each ``GROUP BY`` with ``np.bincount`` over factorised group codes. Group codes
+are cached per key, so asking for the same grouping twice costs one pass over
+the claim amounts.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from claims_join import HashJoin
+from claims_loader import load_employee, load_insurance, load_vendor
+
+
+def combine_tables(insurance, employee, vendor):
+    """Inner join claims with the agent and vendor dimensions (``combineTable``)."""
+    return HashJoin(employee, vendor).join(insurance)
+
+
+class ClaimsAnalytics:
+    def __init__(self, combine_table):
+        self.table = combine_table
+        self.claim_amount = combine_table['CLAIM_AMOUNT'].to_numpy(dtype=float)
+        self.denied = (combine_table['CLAIM_STATUS'] == 'D').to_numpy()
+
+        # shared by every summary, computed once
+        self.n_claims = len(combine_table)
+        self.total_claim = self.claim_amount.sum()
+        self.total_denied = int(self.denied.sum())
+        self._groups = {}
+
+    @classmethod
+    def from_csv(cls, directory, drop_pii=True):
+        insurance = load_insurance(os.path.join(directory, 'insurance_data.csv'), drop_pii=drop_pii)
+        employee = load_employee(os.path.join(directory, 'employee_data.csv'), drop_pii=drop_pii)
+        vendor = load_vendor(os.path.join(directory, 'vendor_data.csv'), drop_pii=drop_pii)
+        return cls(combine_tables(insurance, employee, vendor))
+
+    def _factorize(self, keys):
+        keys = tuple(keys)
+        if keys not in self._groups:
+            if len(keys) == 1:
+                codes, uniques = pd.factorize(self.table[keys[0]], sort=True)
+                uniques = pd.DataFrame({keys[0]: uniques})
+            else:
+                grouped = self.table.groupby(list(keys), sort=True, observed=True)
+                codes = grouped.ngroup().fillna(-1).to_numpy(dtype=int)
+                uniques = grouped.size().index.to_frame(index=False)
+            self._groups[keys] = (codes, uniques)
+        return self._groups[keys]
+
+    def summary(self, keys, attributes=(), with_counts=False):
+        """Claim totals, averages, share of all claims and share of denied claims per group.
+
+        Args:
+            keys (str or list): grouping column(s).
+            attributes (tuple): columns that are constant within a group (e.g.
+                ``AGENT_STATE`` for ``AGENT_ID``) and are reported alongside.
+            with_counts (bool): also report ``count`` and ``INCIDENT_SEV_PERC``
+                (share of all claims).
+
+        Returns:
+            pd.DataFrame: ordered by ``TOTAL_CLAIM_AMOUNT`` descending, with the
+            column names of the original SQL queries.
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        codes, uniques = self._factorize(keys)
+        n_groups = len(uniques)
+
+        valid = codes >= 0
+        codes, amount, denied = codes[valid], self.claim_amount[valid], self.denied[valid]
+        count = np.bincount(codes, minlength=n_groups)
+        total = np.bincount(codes, weights=amount, minlength=n_groups)
+        denied_count = np.bincount(codes, weights=denied, minlength=n_groups)
+
+        out = uniques.copy()
+        if attributes:
+            first = pd.DataFrame({'code': codes}).drop_duplicates('code')
+            idx = np.flatnonzero(valid)[first.index]
+            for col in attributes:
+                values = np.empty(n_groups, dtype=object)
+                values[first['code'].to_numpy()] = self.table[col].to_numpy()[idx]
+                out[col] = values
+        if with_counts:
+            out['count'] = count
+            out['INCIDENT_SEV_PERC'] = count * 100.0 / self.n_claims
+        out['TOTAL_CLAIM_AMOUNT'] = total
+        out['AVERAGE_CLAIM'] = np.round(total / np.maximum(count, 1), 2)
+        out['PERCENTAGE_TOTAL_CLAIM'] = total / self.total_claim * 100
+        out['LIKELIHOOD_FRAUD_CLAIM'] = denied_count / max(self.total_denied, 1) * 100
+        return out.sort_values('TOTAL_CLAIM_AMOUNT', ascending=False, kind='stable').reset_index(drop=True)
+
+    def agent_summary(self):
+        return self.summary('AGENT_ID', attributes=('AGENT_STATE',))
+
+    def vendor_summary(self):
+        return self.summary('VENDOR_ID', attributes=('VENDOR_STATE',))
+
+    def state_summary(self):
+        return self.summary('STATE')
+
+    def insurance_type_summary(self):
+        return self.summary('INSURANCE_TYPE')
+
+    def incident_severity_summary(self):
+        return self.summary('INCIDENT_SEVERITY', with_counts=True)
+
+    def first_per_group(self, keys, columns, mask=None):
+        """One representative row per group, like SQLite's bare columns in ``GROUP BY``."""
+        table = self.table if mask is None else self.table[mask]
+        return (table.drop_duplicates(keys)[list(dict.fromkeys(list(keys) + list(columns)))]
+                     .sort_values(keys).reset_index(drop=True))
+
+    def agent_vendor_pairs(self, min_count=2):
+        """Agent/vendor combinations that appear on at least ``min_count`` claims."""
+        codes, uniques = self._factorize(['AGENT_ID', 'VENDOR_ID'])
+        frequency = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        out = uniques.assign(frequency=frequency)
+        return out[out['frequency'] >= min_count].reset_index(drop=True)
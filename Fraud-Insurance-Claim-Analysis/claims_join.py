@@ -0,0 +1,97 @@
+"""Streaming hash join of the claims fact table with the agent and vendor dimensions.
+
+``combineTable`` was originally a ``SELECT *`` CTE run inside a throwaway
+SQLite database, which needs the whole insurance table in memory and repeats
+``AGENT_ID`` / ``VENDOR_ID`` and the dimension addresses for every claim.
+
+``HashJoin`` builds a hash index (``pd.Index``) over each small dimension table
+once and keeps only the projected dimension columns as arrays. The insurance
+table is then read in chunks with ``claims_loader.load_insurance``; each chunk
+is probed with one vectorised ``get_indexer`` per dimension, rows without a
+match on either side are dropped (inner join), and the dimension attributes are
+gathered with ``take``. Memory is bounded by the chunk size plus the two
+dimensions, so the fact table can be larger than memory; ``to_parquet`` writes
+the denormalised result as one Parquet part per chunk.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from claims_loader import load_employee, load_insurance, load_vendor
+
+# dimension -> (key, {dimension column: output column})
+DIMENSIONS = {
+    'employee': ('AGENT_ID', {'POSTAL_CODE': 'AGENT_POSTAL_CODE', 'STATE': 'AGENT_STATE'}),
+    'vendor': ('VENDOR_ID', {'POSTAL_CODE': 'VENDOR_POSTAL_CODE', 'STATE': 'VENDOR_STATE'}),
+}
+
+
+class DimensionIndex:
+    def __init__(self, table, key, columns):
+        """Hash index over a dimension table.
+
+        Args:
+            table (pd.DataFrame): dimension rows, unique on ``key``.
+            key (str): join column.
+            columns (dict): dimension columns to carry, mapped to their output names.
+        """
+        keys = table[key].astype(str)
+        if keys.duplicated().any():
+            raise ValueError(f"duplicate {key} values in dimension table")
+        self.key = key
+        self.index = pd.Index(keys.to_numpy())
+        self.columns = {out: table[col].reset_index(drop=True) for col, out in columns.items()}
+
+    def probe(self, keys):
+        """Row position of every key in the dimension, -1 when it is missing."""
+        return self.index.get_indexer(keys.astype(str))
+
+
+class HashJoin:
+    def __init__(self, employee, vendor, dimensions=DIMENSIONS):
+        self.indexes = [DimensionIndex(table, *dimensions[name])
+                        for name, table in (('employee', employee), ('vendor', vendor))]
+
+    @classmethod
+    def from_csv(cls, employee_path, vendor_path):
+        return cls(load_employee(employee_path), load_vendor(vendor_path))
+
+    def join(self, insurance, columns=None):
+        """Inner join one chunk of claims with every dimension.
+
+        Args:
+            insurance (pd.DataFrame): claims chunk.
+            columns (list): claim columns to keep, all by default.
+        """
+        positions = [dim.probe(insurance[dim.key]) for dim in self.indexes]
+        matched = np.logical_and.reduce([pos >= 0 for pos in positions])
+        fact = insurance if columns is None else insurance[list(columns)]
+        out = fact[matched].reset_index(drop=True)
+        for dim, pos in zip(self.indexes, positions):
+            pos = pos[matched]
+            for name, values in dim.columns.items():
+                out[name] = values.take(pos).to_numpy()
+        return out
+
+    def stream(self, insurance_path, chunksize=100000, columns=None, drop_pii=True):
+        """Yield joined chunks of an insurance CSV, reading ``chunksize`` claims at a time."""
+        keys = None if columns is None else list(dict.fromkeys(
+            list(columns) + [dim.key for dim in self.indexes]))
+        for chunk in load_insurance(insurance_path, drop_pii=drop_pii, chunksize=chunksize, columns=keys):
+            yield self.join(chunk, columns)
+
+    def to_parquet(self, insurance_path, output_dir, chunksize=100000, columns=None, drop_pii=True):
+        """Write the joined table as ``part-NNNNN.parquet`` files, returning the row count."""
+        os.makedirs(output_dir, exist_ok=True)
+        n_rows = 0
+        for part, chunk in enumerate(self.stream(insurance_path, chunksize, columns, drop_pii)):
+            chunk.to_parquet(os.path.join(output_dir, f'part-{part:05d}.parquet'), index=False)
+            n_rows += len(chunk)
+        return n_rows
+
+    def read(self, insurance_path, chunksize=100000, columns=None, drop_pii=True):
+        """Joined table in memory, for extracts that fit."""
+        chunks = list(self.stream(insurance_path, chunksize, columns, drop_pii))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
@@ -0,0 +1,135 @@
+"""Typed, compact loading of the claims extracts.
+
+``pd.read_csv`` with default settings keeps every string column of
+``insurance_data.csv`` as Python objects (IDs, states, cities, Y/N flags and
+dates alike) and infers 64-bit numerics. The loaders here parse each column
+once into a compact dtype:
+
+* enum-like columns (states, cities, types, flags, agent and vendor IDs) become
+  ``category``, i.e. small integer codes plus one dictionary,
+* unique prefixed IDs (``TXN00000001``, ``A00003822``, ``PLC00008468``) are
+  dictionary-encoded to ``int32`` by stripping the shared prefix; the prefixes
+  are kept in ``df.attrs['id_prefixes']`` for ``decode_ids``,
+* dates are parsed to ``datetime64`` while reading,
+* amounts and counts are downcast to the smallest float / integer type,
+* PII columns are not parsed at all when ``drop_pii=True``.
+
+``'NA'`` is a valid education level in the data, so only empty fields are
+treated as missing.
+"""
+
+import numpy as np
+import pandas as pd
+
+INSURANCE_CATEGORIES = [
+    'INSURANCE_TYPE', 'CITY', 'STATE', 'POSTAL_CODE', 'MARITAL_STATUS', 'EMPLOYMENT_STATUS',
+    'RISK_SEGMENTATION', 'HOUSE_TYPE', 'SOCIAL_CLASS', 'CUSTOMER_EDUCATION_LEVEL', 'CLAIM_STATUS',
+    'INCIDENT_SEVERITY', 'AUTHORITY_CONTACTED', 'INCIDENT_STATE', 'INCIDENT_CITY', 'AGENT_ID', 'VENDOR_ID',
+]
+INSURANCE_IDS = ['TRANSACTION_ID', 'CUSTOMER_ID', 'POLICY_NUMBER']
+INSURANCE_DATES = ['TXN_DATE_TIME', 'POLICY_EFF_DT', 'LOSS_DT', 'REPORT_DT']
+INSURANCE_FLOATS = ['PREMIUM_AMOUNT', 'CLAIM_AMOUNT']
+INSURANCE_INTEGERS = ['AGE', 'TENURE', 'NO_OF_FAMILY_MEMBERS', 'ANY_INJURY', 'POLICE_REPORT_AVAILABLE',
+                      'INCIDENT_HOUR_OF_THE_DAY']
+INSURANCE_PII = ['CUSTOMER_NAME', 'ADDRESS_LINE1', 'ADDRESS_LINE2', 'SSN', 'ROUTING_NUMBER', 'ACCT_NUMBER']
+
+EMPLOYEE_CATEGORIES = ['CITY', 'STATE', 'POSTAL_CODE']
+EMPLOYEE_PII = ['AGENT_NAME', 'ADDRESS_LINE1', 'ADDRESS_LINE2', 'EMP_ROUTING_NUMBER', 'EMP_ACCT_NUMBER']
+VENDOR_CATEGORIES = ['CITY', 'STATE', 'POSTAL_CODE']
+VENDOR_PII = ['ADDRESS_LINE1', 'ADDRESS_LINE2']
+
+_READ_OPTIONS = {'keep_default_na': False, 'na_values': ['']}
+
+
+def _columns(path):
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _usecols(path, pii, drop_pii, columns=None):
+    return [c for c in _columns(path)
+            if not (drop_pii and c in pii) and (columns is None or c in columns)]
+
+
+def encode_prefixed_id(values):
+    """Split ``PREFIX00001234`` style IDs into a shared prefix and ``int32`` codes.
+
+    Returns ``(prefix, codes)``, or ``(None, values)`` when the IDs do not share
+    a prefix followed by digits.
+    """
+    parts = values.str.extract(r'^(\D*)(\d+)$')
+    prefixes = parts[0].dropna().unique()
+    if parts[1].isna().any() or len(prefixes) != 1:
+        return None, values
+    return prefixes[0], parts[1].astype(np.int64).astype(np.int32)
+
+
+def decode_ids(df, width=None):
+    """Turn ID columns encoded by ``load_insurance`` back into strings."""
+    df = df.copy()
+    for col, (prefix, digits) in df.attrs.get('id_prefixes', {}).items():
+        df[col] = prefix + df[col].astype(str).str.zfill(width or digits)
+    return df
+
+
+def _downcast(df, floats, integers):
+    for col in floats:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in integers:
+        if col in df and not df[col].isna().any():
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def load_insurance(path, drop_pii=True, encode_ids=True, chunksize=None, columns=None):
+    """Load ``insurance_data.csv`` with compact dtypes.
+
+    Args:
+        path (str): CSV path.
+        drop_pii (bool): skip customer name, address, SSN and bank account columns.
+        encode_ids (bool): dictionary-encode transaction, customer and policy IDs.
+        chunksize (int): if given, return an iterator of typed chunks.
+        columns (list): only parse these columns, all of them by default.
+    """
+    usecols = _usecols(path, INSURANCE_PII, drop_pii, columns)
+    dtype = {c: 'category' for c in INSURANCE_CATEGORIES if c in usecols}
+    dtype.update({c: str for c in INSURANCE_IDS if c in usecols})
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtype,
+                         parse_dates=[c for c in INSURANCE_DATES if c in usecols],
+                         chunksize=chunksize, **_READ_OPTIONS)
+
+    def typed(df):
+        df = _downcast(df, INSURANCE_FLOATS, INSURANCE_INTEGERS)
+        if encode_ids:
+            prefixes = {}
+            for col in INSURANCE_IDS:
+                if col in df:
+                    digits = int(df[col].str.len().max()) if len(df) else 0
+                    prefix, codes = encode_prefixed_id(df[col])
+                    if prefix is not None:
+                        df[col] = codes
+                        prefixes[col] = (prefix, digits - len(prefix))
+            df.attrs['id_prefixes'] = prefixes
+        return df
+
+    if chunksize:
+        return (typed(chunk) for chunk in reader)
+    return typed(reader)
+
+
+def load_employee(path, drop_pii=True):
+    usecols = _usecols(path, EMPLOYEE_PII, drop_pii)
+    dtype = {c: 'category' for c in EMPLOYEE_CATEGORIES if c in usecols}
+    dtype['AGENT_ID'] = str
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, parse_dates=['DATE_OF_JOINING'], **_READ_OPTIONS)
+
+
+def load_vendor(path, drop_pii=True):
+    usecols = _usecols(path, VENDOR_PII, drop_pii)
+    dtype = {c: 'category' for c in VENDOR_CATEGORIES if c in usecols}
+    dtype['VENDOR_ID'] = str
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, **_READ_OPTIONS)
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
@@ -0,0 +1,389 @@
+"""Persistent SQLite store of the claims data.
+
+Instead of reading the three CSVs whole and re-joining them on every run, the
+tables live in one SQLite file:
+
+* ``insurance`` (keyed by ``TRANSACTION_ID``), ``employee`` (``AGENT_ID``) and
+  ``vendor`` (``VENDOR_ID``),
+* ``claims_joined``, the denormalised ``combineTable`` join, maintained as a
+  table rather than recomputed,
+* indexes on ``AGENT_ID``, ``VENDOR_ID``, ``STATE`` and ``TXN_DATE_TIME``.
+
+``append_transactions`` is append-only: rows whose ``TRANSACTION_ID`` is
+already stored are ignored, and only the newly inserted rows are joined into
+``claims_joined`` (they are found by ``rowid``, which grows monotonically).
+
+The dashboard aggregates (claim sum, claim count and denied count per agent,
+vendor, state, insurance type and incident severity, the overall totals, and
+claim / premium amount counts in fixed-width bins for the histograms) are
+materialised in ``agg_*`` tables. Whenever rows enter ``claims_joined``
+only those rows are grouped and added to the aggregates with an upsert, so a
+refresh costs O(new rows) instead of a scan of all claims. The aggregate keys
+are ``NOT NULL``; claims with a missing key are counted under ``'UNKNOWN'``.
+Every refresh that changes the joined claims also bumps a data version in
+``meta``, which readers such as the dashboard server use to invalidate their
+caches.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+INSURANCE_COLUMNS = {
+    'TXN_DATE_TIME': 'TEXT', 'TRANSACTION_ID': 'TEXT PRIMARY KEY', 'CUSTOMER_ID': 'TEXT',
+    'POLICY_NUMBER': 'TEXT', 'POLICY_EFF_DT': 'TEXT', 'LOSS_DT': 'TEXT', 'REPORT_DT': 'TEXT',
+    'INSURANCE_TYPE': 'TEXT', 'PREMIUM_AMOUNT': 'REAL', 'CLAIM_AMOUNT': 'REAL',
+    'CUSTOMER_NAME': 'TEXT', 'ADDRESS_LINE1': 'TEXT', 'ADDRESS_LINE2': 'TEXT', 'CITY': 'TEXT',
+    'STATE': 'TEXT', 'POSTAL_CODE': 'TEXT', 'SSN': 'TEXT', 'MARITAL_STATUS': 'TEXT',
+    'AGE': 'INTEGER', 'TENURE': 'INTEGER', 'EMPLOYMENT_STATUS': 'TEXT',
+    'NO_OF_FAMILY_MEMBERS': 'INTEGER', 'RISK_SEGMENTATION': 'TEXT', 'HOUSE_TYPE': 'TEXT',
+    'SOCIAL_CLASS': 'TEXT', 'ROUTING_NUMBER': 'TEXT', 'ACCT_NUMBER': 'TEXT',
+    'CUSTOMER_EDUCATION_LEVEL': 'TEXT', 'CLAIM_STATUS': 'TEXT', 'INCIDENT_SEVERITY': 'TEXT',
+    'AUTHORITY_CONTACTED': 'TEXT', 'ANY_INJURY': 'INTEGER', 'POLICE_REPORT_AVAILABLE': 'INTEGER',
+    'INCIDENT_STATE': 'TEXT', 'INCIDENT_CITY': 'TEXT', 'INCIDENT_HOUR_OF_THE_DAY': 'INTEGER',
+    'AGENT_ID': 'TEXT', 'VENDOR_ID': 'TEXT',
+}
+
+EMPLOYEE_COLUMNS = {
+    'AGENT_ID': 'TEXT PRIMARY KEY', 'AGENT_NAME': 'TEXT', 'DATE_OF_JOINING': 'TEXT',
+    'ADDRESS_LINE1': 'TEXT', 'ADDRESS_LINE2': 'TEXT', 'CITY': 'TEXT', 'STATE': 'TEXT',
+    'POSTAL_CODE': 'TEXT', 'EMP_ROUTING_NUMBER': 'TEXT', 'EMP_ACCT_NUMBER': 'TEXT',
+}
+
+VENDOR_COLUMNS = {
+    'VENDOR_ID': 'TEXT PRIMARY KEY', 'VENDOR_NAME': 'TEXT', 'ADDRESS_LINE1': 'TEXT',
+    'ADDRESS_LINE2': 'TEXT', 'CITY': 'TEXT', 'STATE': 'TEXT', 'POSTAL_CODE': 'TEXT',
+}
+
+DIMENSION_COLUMNS = {
+    'AGENT_POSTAL_CODE': 'TEXT', 'AGENT_STATE': 'TEXT',
+    'VENDOR_POSTAL_CODE': 'TEXT', 'VENDOR_STATE': 'TEXT',
+}
+
+INDEXED_COLUMNS = ('AGENT_ID', 'VENDOR_ID', 'STATE', 'TXN_DATE_TIME')
+
+# aggregate key: attribute columns reported with it
+AGGREGATES = {
+    'AGENT_ID': ('AGENT_STATE',),
+    'VENDOR_ID': ('VENDOR_STATE',),
+    'STATE': (),
+    'INSURANCE_TYPE': (),
+    'INCIDENT_SEVERITY': (),
+}
+
+# numeric column: width of the fixed bins its histogram counts are kept in. The
+# widths match the data's precision, so every bin holds a single distinct value
+HISTOGRAMS = {
+    'CLAIM_AMOUNT': 100.0,
+    'PREMIUM_AMOUNT': 0.01,
+}
+
+# aggregate key of claims whose key column is NULL; a NULL primary key would
+# insert a new row on every upsert instead of updating one
+UNKNOWN_KEY = 'UNKNOWN'
+
+# identifiers and codes with leading zeros must stay text when read from CSV
+TEXT_DTYPES = {col: str for cols in (INSURANCE_COLUMNS, EMPLOYEE_COLUMNS, VENDOR_COLUMNS)
+               for col, sql in cols.items() if sql.startswith('TEXT')}
+
+_JOIN_SELECT = """
+SELECT {insurance_columns},
+       e.POSTAL_CODE AS AGENT_POSTAL_CODE, e.STATE AS AGENT_STATE,
+       v.POSTAL_CODE AS VENDOR_POSTAL_CODE, v.STATE AS VENDOR_STATE
+FROM insurance i
+INNER JOIN employee e ON i.AGENT_ID = e.AGENT_ID
+INNER JOIN vendor v ON i.VENDOR_ID = v.VENDOR_ID
+""".format(insurance_columns=', '.join(f'i.{c}' for c in INSURANCE_COLUMNS))
+
+
+def _agg_table(key):
+    return f'agg_{key.lower()}'
+
+
+def _hist_table(column):
+    return f'agg_hist_{column.lower()}'
+
+
+def _create_table(name, columns):
+    body = ', '.join(f'{col} {sql}' for col, sql in columns.items())
+    return f'CREATE TABLE IF NOT EXISTS {name} ({body})'
+
+
+class ClaimsStore:
+    def __init__(self, path='claims.db', read_only=False):
+        """
+        Args:
+            path (str): SQLite file of the store.
+            read_only (bool): open an existing store for reading only. The
+                connection never writes, not even the schema, so readers do not
+                wait for the write lock a loader holds, and it may be shared
+                between threads (each use must be serialised by the caller).
+        """
+        self.path = path
+        if read_only:
+            self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path)
+            self._create_schema()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute(_create_table('insurance', INSURANCE_COLUMNS))
+            self.conn.execute(_create_table('employee', EMPLOYEE_COLUMNS))
+            self.conn.execute(_create_table('vendor', VENDOR_COLUMNS))
+            self.conn.execute(_create_table('claims_joined', {**INSURANCE_COLUMNS, **DIMENSION_COLUMNS}))
+            for table in ('insurance', 'claims_joined'):
+                for col in INDEXED_COLUMNS:
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table} ({col})')
+
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agg_total'").fetchone()
+            if exists and not self._aggregates_current():
+                # aggregates of an older store may hold several NULL-keyed rows or
+                # lack the histogram bins: rebuild them
+                for table in [_agg_table(key) for key in AGGREGATES] + [_hist_table(c) for c in HISTOGRAMS]:
+                    self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+                self.conn.execute('DROP TABLE agg_total')
+                exists = None
+            for key, attributes in AGGREGATES.items():
+                columns = {key: 'TEXT PRIMARY KEY NOT NULL', **{a: 'TEXT' for a in attributes},
+                           'CLAIM_SUM': 'REAL', 'CLAIM_COUNT': 'INTEGER', 'DENIED_COUNT': 'INTEGER'}
+                self.conn.execute(_create_table(_agg_table(key), columns))
+            for column in HISTOGRAMS:
+                self.conn.execute(_create_table(_hist_table(column), {
+                    'BIN': 'INTEGER PRIMARY KEY NOT NULL', 'BIN_MIN': 'REAL', 'BIN_MAX': 'REAL',
+                    'BIN_COUNT': 'INTEGER'}))
+            self.conn.execute(_create_table('agg_total', {
+                'ID': 'INTEGER PRIMARY KEY CHECK (ID = 1)',
+                'CLAIM_SUM': 'REAL', 'CLAIM_COUNT': 'INTEGER', 'DENIED_COUNT': 'INTEGER'}))
+            self.conn.execute(_create_table('meta', {
+                'ID': 'INTEGER PRIMARY KEY CHECK (ID = 1)', 'VERSION': 'INTEGER'}))
+            self.conn.execute('INSERT OR IGNORE INTO meta (ID, VERSION) VALUES (1, 0)')
+            if not exists:
+                # store created before the aggregates existed: build them once
+                self._update_aggregates(0)
+
+    def _aggregates_current(self):
+        """Whether the aggregate keys are ``NOT NULL`` and the histogram tables exist."""
+        for key in AGGREGATES:
+            columns = self.conn.execute(f'PRAGMA table_info({_agg_table(key)})').fetchall()
+            if not any(name == key and notnull for _, name, _, notnull, _, _ in columns):
+                return False
+        return all(self.conn.execute(f'PRAGMA table_info({_hist_table(c)})').fetchall() for c in HISTOGRAMS)
+
+    def _last_joined_rowid(self):
+        return self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM claims_joined').fetchone()[0]
+
+    def _update_aggregates(self, since_rowid, changed=False):
+        """Add the ``claims_joined`` rows after ``since_rowid`` to the aggregates.
+
+        The data version is bumped only when rows were added or ``changed``
+        says existing joined rows were updated, so a no-op load keeps the
+        readers' caches valid.
+        """
+        added = self.conn.execute('SELECT EXISTS (SELECT 1 FROM claims_joined WHERE rowid > ?)',
+                                  (since_rowid,)).fetchone()[0]
+        if not added:
+            if changed:
+                self.conn.execute('UPDATE meta SET VERSION = VERSION + 1')
+            return
+        measures = """SUM(CLAIM_AMOUNT), COUNT(*), SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END)"""
+        increment = """CLAIM_SUM = CLAIM_SUM + excluded.CLAIM_SUM,
+                       CLAIM_COUNT = CLAIM_COUNT + excluded.CLAIM_COUNT,
+                       DENIED_COUNT = DENIED_COUNT + excluded.DENIED_COUNT"""
+        for key, attributes in AGGREGATES.items():
+            columns = ', '.join((key,) + attributes)
+            group = f'COALESCE({key}, ?)'
+            refresh = ''.join(f', {a} = excluded.{a}' for a in attributes)
+            self.conn.execute(f"""
+                INSERT INTO {_agg_table(key)} ({columns}, CLAIM_SUM, CLAIM_COUNT, DENIED_COUNT)
+                SELECT {', '.join((group,) + attributes)}, {measures} FROM claims_joined
+                WHERE rowid > ? GROUP BY {group}
+                ON CONFLICT ({key}) DO UPDATE SET {increment}{refresh}""", (UNKNOWN_KEY, since_rowid, UNKNOWN_KEY))
+        self.conn.execute(f"""
+            INSERT INTO agg_total (ID, CLAIM_SUM, CLAIM_COUNT, DENIED_COUNT)
+            SELECT 1, COALESCE(SUM(CLAIM_AMOUNT), 0), COUNT(*),
+                   COALESCE(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END), 0)
+            FROM claims_joined WHERE rowid > ?
+            ON CONFLICT (ID) DO UPDATE SET {increment}""", (since_rowid,))
+        for column, width in HISTOGRAMS.items():
+            # floor division: CAST truncates towards zero, so step negative fractions down
+            ratio = f'{column} / {width!r}'
+            fine = f'CAST({ratio} AS INTEGER) - ({ratio} < CAST({ratio} AS INTEGER))'
+            self.conn.execute(f"""
+                INSERT INTO {_hist_table(column)} (BIN, BIN_MIN, BIN_MAX, BIN_COUNT)
+                SELECT {fine} AS fine, MIN({column}), MAX({column}), COUNT(*) FROM claims_joined
+                WHERE rowid > ? AND {column} IS NOT NULL GROUP BY fine
+                ON CONFLICT (BIN) DO UPDATE SET BIN_MIN = MIN(BIN_MIN, excluded.BIN_MIN),
+                    BIN_MAX = MAX(BIN_MAX, excluded.BIN_MAX), BIN_COUNT = BIN_COUNT + excluded.BIN_COUNT""",
+                              (since_rowid,))
+        self.conn.execute('UPDATE meta SET VERSION = VERSION + 1')
+
+    def version(self):
+        """Data version, incremented by every load that changes the joined claims."""
+        return self.conn.execute('SELECT VERSION FROM meta').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def _insert(self, table, columns, df, verb='INSERT OR IGNORE'):
+        df = df[list(columns)].astype(object).where(df[list(columns)].notna(), None)
+        placeholders = ', '.join('?' * len(columns))
+        self.conn.executemany(f'{verb} INTO {table} ({", ".join(columns)}) VALUES ({placeholders})',
+                              df.itertuples(index=False, name=None))
+
+    def _merge_dimension(self, table, columns, df, key, joined_columns):
+        """Upsert only the changed rows of a dimension table.
+
+        The incoming rows are staged in a temporary table and compared with the
+        stored ones. Returns ``(new_keys, moved_keys)``: keys seen for the
+        first time, and stored keys whose ``POSTAL_CODE`` / ``STATE`` (the
+        columns copied into ``claims_joined``) changed.
+        """
+        staged = f'staged_{table}'
+        self.conn.execute(f'DROP TABLE IF EXISTS temp.{staged}')
+        self.conn.execute(f'CREATE TEMP TABLE {staged} AS SELECT * FROM {table} WHERE 0')
+        self._insert(staged, columns, df, verb='INSERT')
+
+        differs = ' OR '.join(f'n.{c} IS NOT d.{c}' for c in columns if c != key)
+        moved = ' OR '.join(f'n.{c} IS NOT d.{c}' for c in joined_columns)
+        rows = self.conn.execute(f"""
+            SELECT n.{key}, d.{key} IS NULL, COALESCE({moved}, 0) FROM {staged} n
+            LEFT JOIN {table} d ON d.{key} = n.{key}
+            WHERE d.{key} IS NULL OR {differs}""").fetchall()
+        changed = [r[0] for r in rows]
+        if changed:
+            self.conn.executemany(
+                f'INSERT OR REPLACE INTO {table} SELECT * FROM {staged} WHERE {key} = ?',
+                ((k,) for k in changed))
+        self.conn.execute(f'DROP TABLE temp.{staged}')
+        return [k for k, new, _ in rows if new], [k for k, new, m in rows if not new and m]
+
+    def load_dimensions(self, employee=None, vendor=None):
+        """Upsert changed agents and vendors and bring the joined table up to date.
+
+        Only claims of agents or vendors whose location changed are updated,
+        and only claims of newly seen agents or vendors are joined, so a
+        reload of unchanged extracts touches no claims.
+        """
+        with self.conn:
+            last_joined = self._last_joined_rowid()
+            new_agents, new_vendors, moved_any = [], [], False
+            if employee is not None:
+                new_agents, moved = self._merge_dimension('employee', EMPLOYEE_COLUMNS, employee, 'AGENT_ID',
+                                                          ('POSTAL_CODE', 'STATE'))
+                moved_any = moved_any or bool(moved)
+                self.conn.executemany("""
+                    UPDATE claims_joined
+                    SET AGENT_POSTAL_CODE = e.POSTAL_CODE, AGENT_STATE = e.STATE
+                    FROM employee e WHERE e.AGENT_ID = ? AND claims_joined.AGENT_ID = e.AGENT_ID""",
+                                      ((k,) for k in moved))
+                self.conn.executemany("""
+                    UPDATE agg_agent_id SET AGENT_STATE = e.STATE
+                    FROM employee e WHERE e.AGENT_ID = ? AND agg_agent_id.AGENT_ID = e.AGENT_ID""",
+                                      ((k,) for k in moved))
+            if vendor is not None:
+                new_vendors, moved = self._merge_dimension('vendor', VENDOR_COLUMNS, vendor, 'VENDOR_ID',
+                                                           ('POSTAL_CODE', 'STATE'))
+                moved_any = moved_any or bool(moved)
+                self.conn.executemany("""
+                    UPDATE claims_joined
+                    SET VENDOR_POSTAL_CODE = v.POSTAL_CODE, VENDOR_STATE = v.STATE
+                    FROM vendor v WHERE v.VENDOR_ID = ? AND claims_joined.VENDOR_ID = v.VENDOR_ID""",
+                                      ((k,) for k in moved))
+                self.conn.executemany("""
+                    UPDATE agg_vendor_id SET VENDOR_STATE = v.STATE
+                    FROM vendor v WHERE v.VENDOR_ID = ? AND agg_vendor_id.VENDOR_ID = v.VENDOR_ID""",
+                                      ((k,) for k in moved))
+            # claims that arrived before their agent or vendor can be joined now
+            for column, keys in (('AGENT_ID', new_agents), ('VENDOR_ID', new_vendors)):
+                self.conn.executemany(f'INSERT OR IGNORE INTO claims_joined {_JOIN_SELECT} WHERE i.{column} = ?',
+                                      ((k,) for k in keys))
+            self._update_aggregates(last_joined, changed=moved_any)
+
+    def append_transactions(self, insurance):
+        """Append new claims; already stored ``TRANSACTION_ID`` values are skipped.
+
+        Returns:
+            int: number of newly stored claims.
+        """
+        with self.conn:
+            last_rowid = self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM insurance').fetchone()[0]
+            last_joined = self._last_joined_rowid()
+            self._insert('insurance', INSURANCE_COLUMNS, insurance)
+            self.conn.execute(f'INSERT OR IGNORE INTO claims_joined {_JOIN_SELECT} WHERE i.rowid > ?',
+                              (last_rowid,))
+            self._update_aggregates(last_joined)
+            return self.conn.execute('SELECT COUNT(*) FROM insurance WHERE rowid > ?',
+                                     (last_rowid,)).fetchone()[0]
+
+    def load_csv(self, insurance_path, employee_path=None, vendor_path=None, chunksize=100000):
+        """Load the CSV extracts, streaming the claims file in chunks."""
+        employee = pd.read_csv(employee_path, dtype=TEXT_DTYPES) if employee_path else None
+        vendor = pd.read_csv(vendor_path, dtype=TEXT_DTYPES) if vendor_path else None
+        if employee is not None or vendor is not None:
+            self.load_dimensions(employee, vendor)
+
+        added = 0
+        for chunk in pd.read_csv(insurance_path, dtype=TEXT_DTYPES, chunksize=chunksize):
+            added += self.append_transactions(chunk)
+        return added
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def read_joined(self, since=None):
+        """The joined claims table, optionally only transactions after ``since``."""
+        if since is None:
+            return self.query('SELECT * FROM claims_joined')
+        return self.query('SELECT * FROM claims_joined WHERE TXN_DATE_TIME > ?', (str(since),))
+
+    def aggregate(self, key):
+        """Dashboard summary for ``key`` read from the materialised aggregates.
+
+        Same columns as ``ClaimsAnalytics.summary``, ordered by
+        ``TOTAL_CLAIM_AMOUNT`` descending.
+        """
+        if key not in AGGREGATES:
+            raise ValueError(f"no materialised aggregate for {key}")
+        total_sum, total_count, total_denied = self.conn.execute(
+            'SELECT CLAIM_SUM, CLAIM_COUNT, DENIED_COUNT FROM agg_total').fetchone() or (0, 0, 0)
+        df = self.query(f'SELECT * FROM {_agg_table(key)}')
+        df['count'] = df['CLAIM_COUNT']
+        df['INCIDENT_SEV_PERC'] = df['CLAIM_COUNT'] * 100.0 / max(total_count, 1)
+        df['TOTAL_CLAIM_AMOUNT'] = df['CLAIM_SUM']
+        df['AVERAGE_CLAIM'] = (df['CLAIM_SUM'] / df['CLAIM_COUNT']).round(2)
+        df['PERCENTAGE_TOTAL_CLAIM'] = df['CLAIM_SUM'] / (total_sum or 1) * 100
+        df['LIKELIHOOD_FRAUD_CLAIM'] = df['DENIED_COUNT'] / max(total_denied, 1) * 100
+        df = df.drop(columns=['CLAIM_SUM', 'CLAIM_COUNT', 'DENIED_COUNT'])
+        return df.sort_values('TOTAL_CLAIM_AMOUNT', ascending=False).reset_index(drop=True)
+
+    def histogram(self, column, bins=30):
+        """Equal-width histogram of a numeric claims column, binned inside SQLite.
+
+        Columns in ``HISTOGRAMS`` are regrouped from their materialised fixed
+        bins, so the cost depends on the number of distinct bins, not claims;
+        each fixed bin is placed by its smallest value, which is exact while a
+        bin holds one distinct value. Other numeric columns scan ``claims_joined``.
+
+        Returns:
+            dict: ``edges`` (``bins + 1`` values) and ``counts`` (``bins`` values).
+        """
+        if INSURANCE_COLUMNS.get(column) not in ('REAL', 'INTEGER'):
+            raise ValueError(f"{column} is not a numeric claims column")
+        if column in HISTOGRAMS:
+            source, value, count = _hist_table(column), 'BIN_MIN', 'SUM(BIN_COUNT)'
+            lo, hi = self.conn.execute(f'SELECT MIN(BIN_MIN), MAX(BIN_MAX) FROM {source}').fetchone()
+        else:
+            source, value, count = 'claims_joined', column, 'COUNT(*)'
+            lo, hi = self.conn.execute(f'SELECT MIN({column}), MAX({column}) FROM claims_joined').fetchone()
+        if lo is None:
+            return {'edges': [], 'counts': []}
+        width = (hi - lo) / bins or 1.0
+        counts = [0] * bins
+        rows = self.conn.execute(f"""
+            SELECT MIN(CAST(({value} - ?) / ? AS INTEGER), ?) AS coarse, {count}
+            FROM {source} WHERE {value} IS NOT NULL GROUP BY coarse""", (lo, width, bins - 1))
+        for b, n in rows:
+            counts[b] = n
+        return {'edges': [lo + width * i for i in range(bins + 1)], 'counts': counts}
@@ -0,0 +1,193 @@
+"""Agent / vendor / customer collusion rings.
+
+The fraud script's only anomaly check lists agent-vendor combinations that
+appear on more than one claim. ``CollusionGraph`` generalises it to a sparse
+graph over agents, vendors and customers:
+
+* every claim contributes an agent-vendor, agent-customer and vendor-customer
+  edge; the claims are read in chunks and each edge type is aggregated with a
+  ``groupby`` per chunk and added to the running totals, so memory is
+  proportional to the number of distinct edges plus one chunk, not claims.
+  A claim with a missing id forms no edge on that side,
+* each edge is scored by its *excess denials*: ``count * (rate - base_rate)``
+  where ``rate`` is the edge's denial rate shrunk towards the overall rate,
+* edges above ``min_score`` form the suspicious subgraph; its connected
+  components are the candidate rings, and the densest part of each ring is
+  found by greedy peeling (Charikar) on the CSR adjacency.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+ENTITY_COLUMNS = ('AGENT_ID', 'VENDOR_ID', 'CUSTOMER_ID')
+EDGE_TYPES = (('AGENT_ID', 'VENDOR_ID'), ('AGENT_ID', 'CUSTOMER_ID'), ('VENDOR_ID', 'CUSTOMER_ID'))
+
+
+def _chunks(claims, chunksize):
+    if isinstance(claims, pd.DataFrame):
+        for start in range(0, len(claims), chunksize):
+            yield claims.iloc[start:start + chunksize]
+    else:
+        yield from claims
+
+
+def densest_subgraph(adj, nodes):
+    """Greedy peeling of the node set maximising total edge weight / nodes.
+
+    Args:
+        adj (scipy.sparse.csr_matrix): symmetric weighted adjacency.
+        nodes (np.ndarray): node ids of one connected component.
+
+    Returns:
+        tuple: ``(members, density)``.
+    """
+    nodes = np.asarray(nodes)
+    alive = {int(n) for n in nodes}
+    degree = {n: float(adj[n].sum()) for n in alive}
+    total = sum(degree.values()) / 2
+    heap = [(d, n) for n, d in degree.items()]
+    heapq.heapify(heap)
+
+    best_density, best_size, removed = total / len(alive), len(alive), []
+    while len(alive) > 1:
+        d, n = heapq.heappop(heap)
+        if n not in alive or d != degree[n]:
+            continue
+        alive.remove(n)
+        removed.append(n)
+        total -= degree[n]
+        row = adj[n]
+        for m, w in zip(row.indices, row.data):
+            if m in alive:
+                degree[m] -= w
+                heapq.heappush(heap, (degree[m], m))
+        density = total / len(alive)
+        if density > best_density:
+            best_density, best_size = density, len(alive)
+
+    dropped = set(removed[:len(nodes) - best_size])
+    return np.array([n for n in nodes if int(n) not in dropped]), best_density
+
+
+class CollusionGraph:
+    def __init__(self, combine_table, prior_strength=5.0, chunksize=100000):
+        """Build the graph from a joined claims table.
+
+        Args:
+            combine_table (pd.DataFrame or iterable): joined claims, or an
+                iterable of chunks of them (e.g. ``pd.read_sql_query(...,
+                chunksize=...)``); needs ``AGENT_ID``, ``VENDOR_ID``,
+                ``CUSTOMER_ID``, ``CLAIM_STATUS`` and ``CLAIM_AMOUNT``.
+            prior_strength (float): pseudo-claims at the overall denial rate
+                added to every edge before computing its rate.
+            chunksize (int): claims aggregated at a time when ``combine_table``
+                is a DataFrame.
+        """
+        totals = dict.fromkeys(EDGE_TYPES)
+        n_claims = n_denied = 0
+        for chunk in _chunks(combine_table, chunksize):
+            frame = pd.DataFrame({col: chunk[col].to_numpy() for col in ENTITY_COLUMNS})
+            frame['claims'] = 1
+            frame['denied'] = (chunk['CLAIM_STATUS'] == 'D').to_numpy(dtype=int)
+            frame['claim_amount'] = chunk['CLAIM_AMOUNT'].to_numpy(dtype=float)
+            n_claims += len(frame)
+            n_denied += int(frame['denied'].sum())
+            for pair in EDGE_TYPES:
+                # claims with a missing id on either side do not form this edge
+                part = frame.groupby(list(pair), sort=False)[['claims', 'denied', 'claim_amount']].sum()
+                totals[pair] = part if totals[pair] is None else totals[pair].add(part, fill_value=0)
+        self.base_rate = n_denied / n_claims if n_claims else 0.0
+
+        # nodes are the entities on at least one edge, numbered per entity type
+        ids = {col: [] for col in ENTITY_COLUMNS}
+        for pair, edges in totals.items():
+            for level, col in enumerate(pair):
+                if edges is not None:
+                    ids[col].append(edges.index.get_level_values(level))
+        index, offsets, offset = {}, {}, 0
+        for col in ENTITY_COLUMNS:
+            index[col] = pd.Index(np.concatenate(ids[col]) if ids[col] else []).unique()
+            offsets[col] = offset
+            offset += len(index[col])
+        self.labels = np.concatenate([np.asarray(index[col], dtype=object) for col in ENTITY_COLUMNS])
+        self.kinds = np.concatenate([np.full(len(index[col]), col, dtype=object) for col in ENTITY_COLUMNS])
+        self.n_nodes = offset
+
+        frames = []
+        for (source, target), edges in totals.items():
+            if edges is None or edges.empty:
+                continue
+            frames.append(pd.DataFrame({
+                'source': index[source].get_indexer(edges.index.get_level_values(0)) + offsets[source],
+                'target': index[target].get_indexer(edges.index.get_level_values(1)) + offsets[target],
+                'claims': edges['claims'].to_numpy(dtype=np.int64),
+                'denied': edges['denied'].to_numpy(dtype=np.int64),
+                'claim_amount': edges['claim_amount'].to_numpy(dtype=float),
+            }))
+        edges = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            {'source': [], 'target': [], 'claims': [], 'denied': [], 'claim_amount': []})
+        edges = edges.sort_values(['source', 'target'], kind='stable').reset_index(drop=True)
+        rate = (edges['denied'] + prior_strength * self.base_rate) / (edges['claims'] + prior_strength)
+        edges['denial_rate'] = rate
+        edges['score'] = np.maximum(edges['claims'] * (rate - self.base_rate), 0.0)
+        self.edges = edges
+
+    def edge_table(self, min_claims=2):
+        """Scored edges with entity ids, most suspicious first."""
+        edges = self.edges[self.edges['claims'] >= min_claims]
+        return (edges.assign(source_type=self.kinds[edges['source']], source_id=self.labels[edges['source']],
+                             target_type=self.kinds[edges['target']], target_id=self.labels[edges['target']])
+                     .drop(columns=['source', 'target'])
+                     .sort_values('score', ascending=False).reset_index(drop=True))
+
+    def rings(self, min_score=1.0, min_size=3, peel=True):
+        """Connected components of the suspicious subgraph, ranked by density.
+
+        Returns:
+            pd.DataFrame: one row per ring with member counts per entity type,
+            claims, denied claims, total and per-node score, and the member ids
+            of its densest part.
+        """
+        strong = self.edges[self.edges['score'] >= min_score]
+        shape = (self.n_nodes, self.n_nodes)
+        adj = coo_matrix((strong['score'], (strong['source'], strong['target'])), shape=shape).tocsr()
+        adj = adj + adj.T
+        n_components, component = connected_components(adj, directed=False)
+
+        sizes = np.bincount(component, minlength=n_components)
+        order = np.argsort(component, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(sizes)])
+
+        edge_component = component[strong['source'].to_numpy()]
+        claims = np.bincount(edge_component, weights=strong['claims'], minlength=n_components)
+        denied = np.bincount(edge_component, weights=strong['denied'], minlength=n_components)
+        score = np.bincount(edge_component, weights=strong['score'], minlength=n_components)
+
+        rows = []
+        # nodes without a suspicious edge are singleton components and drop out here
+        for comp in np.flatnonzero(sizes >= max(min_size, 2)):
+            members = order[starts[comp]:starts[comp + 1]]
+            if peel:
+                core, density = densest_subgraph(adj, members)
+            else:
+                core, density = members, score[comp] / len(members)
+            kinds = pd.Series(self.kinds[members]).value_counts()
+            rows.append({
+                'ring': int(comp),
+                'agents': int(kinds.get('AGENT_ID', 0)),
+                'vendors': int(kinds.get('VENDOR_ID', 0)),
+                'customers': int(kinds.get('CUSTOMER_ID', 0)),
+                'edge_claims': int(claims[comp]),
+                'edge_denied': int(denied[comp]),
+                'score': score[comp],
+                'density': density,
+                'core_members': list(self.labels[core]),
+            })
+        if not rows:
+            return pd.DataFrame(columns=['ring', 'agents', 'vendors', 'customers', 'edge_claims',
+                                         'edge_denied', 'score', 'density', 'core_members'])
+        return pd.DataFrame(rows).sort_values('density', ascending=False).reset_index(drop=True)
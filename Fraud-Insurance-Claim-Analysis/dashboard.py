@@ -0,0 +1,183 @@
+"""Claims dashboard server.
+
+The figures of ``fraud_insurance_claim.py`` (insurance type pies, the state
+choropleth, incident severity bars, claim / premium histograms) are built from
+the aggregates ``ClaimsStore`` maintains, never from the claims themselves:
+
+* the histograms are regrouped inside SQLite from the fixed-width bin counts
+  the store maintains (``ClaimsStore.histogram``), so a rebuild reads the bins
+  rather than the claims, and only ``bins`` counts reach the browser,
+* every figure is serialised to Plotly JSON once per data version, the
+  figures being built in parallel on a thread pool, and kept in memory,
+* each response carries an ETag made of the store's data version, so browsers
+  revalidate with ``If-None-Match`` and get ``304 Not Modified`` until a load
+  into the store bumps the version and the payloads are rebuilt.
+
+A dashboard load therefore costs one ``SELECT VERSION`` plus sending cached
+bytes, independent of the number of claims.
+
+Run with ``python dashboard.py --db claims.db``.
+"""
+
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.express as px
+import plotly.graph_objects as go
+from flask import Flask, Response, abort, request
+from plotly.subplots import make_subplots
+
+from claims_store import ClaimsStore
+
+
+def insurance_type_figure(store, bins):
+    insurance_type = store.aggregate('INSURANCE_TYPE')
+    fig = make_subplots(rows=1, cols=2, specs=[[{'type': 'domain'}, {'type': 'domain'}]],
+                        subplot_titles=('Total Claim Amount', 'Likelihood of Fraud Claim'))
+    for col, value in enumerate(('TOTAL_CLAIM_AMOUNT', 'LIKELIHOOD_FRAUD_CLAIM'), start=1):
+        fig.add_trace(go.Pie(labels=insurance_type['INSURANCE_TYPE'], values=insurance_type[value],
+                             hole=0.5, marker_colors=px.colors.sequential.RdBu,
+                             text=insurance_type['INSURANCE_TYPE'], textposition='outside'), row=1, col=col)
+    fig.update_layout(title_text='Insurance Type Wise Analysis')
+    return fig
+
+
+def state_figure(store, bins):
+    return px.choropleth(store.aggregate('STATE'), locations='STATE', locationmode='USA-states',
+                         color='TOTAL_CLAIM_AMOUNT', scope='usa',
+                         hover_data=['TOTAL_CLAIM_AMOUNT', 'PERCENTAGE_TOTAL_CLAIM', 'LIKELIHOOD_FRAUD_CLAIM'],
+                         title='Claim by States', color_continuous_scale='Viridis')
+
+
+def incident_severity_figure(store, bins):
+    incident_severity = store.aggregate('INCIDENT_SEVERITY')
+    fig = make_subplots(rows=1, cols=2, subplot_titles=('Incident Severity Percentage', 'Total Claim Amount'))
+    for col, value in enumerate(('INCIDENT_SEV_PERC', 'TOTAL_CLAIM_AMOUNT'), start=1):
+        fig.add_trace(go.Bar(x=incident_severity['INCIDENT_SEVERITY'], y=incident_severity[value]),
+                      row=1, col=col)
+    fig.update_layout(template='seaborn', title_text='Incident_Severity', showlegend=False)
+    return fig
+
+
+def amount_figure(store, bins):
+    fig = make_subplots(rows=1, cols=2, subplot_titles=('Claim Amount Distribution',
+                                                        'Premium Amount Distribution'))
+    for col, (column, color) in enumerate((('CLAIM_AMOUNT', 'skyblue'), ('PREMIUM_AMOUNT', 'salmon')), start=1):
+        hist = store.histogram(column, bins)
+        edges = hist['edges']
+        fig.add_trace(go.Bar(x=[(a + b) / 2 for a, b in zip(edges[:-1], edges[1:])], y=hist['counts'],
+                             width=[b - a for a, b in zip(edges[:-1], edges[1:])], marker_color=color,
+                             name=column), row=1, col=col)
+        fig.update_yaxes(title_text='Frequency', row=1, col=col)
+    fig.update_layout(showlegend=False, bargap=0)
+    return fig
+
+
+FIGURES = {
+    'insurance_type': insurance_type_figure,
+    'states': state_figure,
+    'incident_severity': incident_severity_figure,
+    'amounts': amount_figure,
+}
+
+
+class _SharedStore:
+    """A read-only ``ClaimsStore`` shared by all threads, one call at a time."""
+
+    def __init__(self, store, lock):
+        self._store = store
+        self._lock = lock
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+        return locked
+
+
+class DashboardCache:
+    def __init__(self, store_path, bins=30, n_jobs=4):
+        self.store_path = store_path
+        self.bins = bins
+        self.n_jobs = n_jobs
+        self.version = None
+        self.payloads = {}
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # one read-only connection: no schema writes, so requests never wait on a loader's write lock
+        self.store = _SharedStore(ClaimsStore(store_path, read_only=True), self._lock)
+
+    def _build(self, name):
+        return FIGURES[name](self.store, self.bins).to_json()
+
+    def current(self):
+        """``(version, payloads)``, rebuilding the payloads if the store has changed."""
+        version = self.store.version()
+        if version != self.version:
+            with self._rebuild_lock:
+                if version != self.version:
+                    with ThreadPoolExecutor(self.n_jobs) as pool:
+                        payloads = dict(zip(FIGURES, pool.map(self._build, FIGURES)))
+                    self.payloads, self.version = payloads, version
+        return self.version, self.payloads
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head><script src="https://cdn.plot.ly/plotly-2.27.0.min.js"></script></head>
+<body>
+{divs}
+<script>
+for (const name of {names}) {{
+  fetch('/figures/' + name).then(r => r.json()).then(fig => Plotly.newPlot(name, fig.data, fig.layout));
+}}
+</script>
+</body>
+</html>
+"""
+
+
+def create_app(store_path, bins=30, n_jobs=4):
+    app = Flask(__name__)
+    cache = DashboardCache(store_path, bins, n_jobs)
+    cache.current()
+
+    @app.route('/')
+    def index():
+        divs = '\n'.join(f'<div id="{name}"></div>' for name in FIGURES)
+        return INDEX_HTML.format(divs=divs, names=list(FIGURES))
+
+    @app.route('/figures/<name>')
+    def figure(name):
+        if name not in FIGURES:
+            abort(404)
+        version, payloads = cache.current()
+        response = Response(payloads[name], mimetype='application/json')
+        response.set_etag(f'{version}-{cache.bins}-{name}')
+        # the browser may keep the payload but must revalidate it on every load
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    @app.route('/version')
+    def version():
+        return {'version': cache.current()[0]}
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the claims dashboard from a ClaimsStore.')
+    parser.add_argument('--db', default='claims.db', help='ClaimsStore SQLite file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--bins', type=int, default=30, help='histogram bins')
+    parser.add_argument('--n-jobs', type=int, default=4, help='threads building the figure payloads')
+    args = parser.parse_args(argv)
+    create_app(args.db, args.bins, args.n_jobs).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
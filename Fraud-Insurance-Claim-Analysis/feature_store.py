@@ -0,0 +1,312 @@
+"""Per-entity fraud features and claim risk scoring.
+
+The fraud script only reports agent-level ``LIKELIHOOD_FRAUD_CLAIM`` and
+vendor / state denial rates as tables. ``FeatureStore`` precomputes features
+for every agent, vendor, customer, postal code, incident city and incident
+hour from the claims history:
+
+* claim count, overall and trailing-window denial rate (shrunk towards the
+  global rate so entities with few claims are not extreme),
+* mean and standard deviation of the claim amount,
+* mean LOSS_DT -> REPORT_DT lag in days.
+
+Each entity's features are a float matrix saved as ``.npy`` next to its key
+list; lookups go through a hash index (``pd.Index.get_indexer``), so joining
+features to a batch of claims is one vectorised gather per entity and a single
+claim costs a dict lookup per entity. Unknown entities get the global row.
+
+``ClaimScorer`` turns the joined features (plus claim-level amount z-scores and
+report lag) into a denial-risk probability with a logistic model fitted on the
+history's ``CLAIM_STATUS``. The store's features include every claim's own
+status, so the model is trained on ``FeatureStore.point_in_time`` instead: the
+same features computed for each claim from the claims strictly before its
+``TXN_DATE_TIME``. The fitted weights and standardisation are saved as JSON,
+so intake scoring loads them instead of refitting.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+ENTITIES = {
+    'AGENT_ID': 'agent',
+    'VENDOR_ID': 'vendor',
+    'CUSTOMER_ID': 'customer',
+    'POSTAL_CODE': 'postal',
+    'INCIDENT_CITY': 'city',
+    'INCIDENT_HOUR_OF_THE_DAY': 'hour',
+}
+FEATURES = ('claims', 'denial_rate', 'denial_rate_recent', 'claim_mean', 'claim_std', 'report_lag_mean')
+_SUMS = ('n', 'denied', 'amount', 'amount_sq', 'lag')
+
+
+def report_lag_days(df):
+    return (pd.to_datetime(df['REPORT_DT']) - pd.to_datetime(df['LOSS_DT'])).dt.days.to_numpy(dtype=float)
+
+
+def _prior_sums(frame, keys, window):
+    """Sums of ``_SUMS`` over the rows of the same key in ``[txn - window, txn)``.
+
+    ``frame`` is sorted by ``txn``; the result is aligned to its index.
+    """
+    codes = pd.factorize(keys)[0]
+    sums = frame.groupby(codes).rolling(window, on='txn', closed='left')[list(_SUMS)].sum()
+    # the rolling result is indexed by time, in the order of the groups and then of ``frame``
+    values = np.empty((len(frame), len(_SUMS)))
+    values[np.argsort(codes, kind='stable')] = sums[list(_SUMS)].to_numpy()
+    return pd.DataFrame(np.nan_to_num(values), index=frame.index, columns=list(_SUMS))
+
+
+def _moments(sums, fallback):
+    """Mean amount, amount standard deviation and mean lag, ``fallback`` where too few claims."""
+    n = sums['n'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums['amount'].to_numpy() / n
+        var = (sums['amount_sq'].to_numpy() - n * mean ** 2) / (n - 1)
+        lag = sums['lag'].to_numpy() / n
+    std = np.sqrt(np.maximum(var, 0.0))
+    return (np.where(n > 0, mean, fallback[0]), np.where(n > 1, std, fallback[1]),
+            np.where(n > 0, lag, fallback[2]))
+
+
+class FeatureStore:
+    def __init__(self, tables=None, window_days=90, prior_strength=10.0):
+        # entity column -> (hash index of keys, feature matrix with a trailing global row)
+        self.tables = tables or {}
+        self.window_days = window_days
+        self.prior_strength = prior_strength
+
+    @classmethod
+    def build(cls, claims, window_days=90, prior_strength=10.0, as_of=None):
+        """Compute the features of every entity from a claims history.
+
+        Args:
+            claims (pd.DataFrame): claims with the entity columns, ``CLAIM_STATUS``,
+                ``CLAIM_AMOUNT``, ``LOSS_DT``, ``REPORT_DT`` and ``TXN_DATE_TIME``.
+            window_days (int): length of the trailing window for the recent denial rate.
+            prior_strength (float): pseudo-claims at the global denial rate.
+            as_of (str or Timestamp): end of the trailing window, latest claim by default.
+        """
+        txn = pd.to_datetime(claims['TXN_DATE_TIME'])
+        as_of = txn.max() if as_of is None else pd.Timestamp(as_of)
+        frame = pd.DataFrame({
+            'denied': (claims['CLAIM_STATUS'] == 'D').to_numpy(dtype=float),
+            'amount': claims['CLAIM_AMOUNT'].to_numpy(dtype=float),
+            'lag': report_lag_days(claims),
+        })
+        frame['recent'] = (txn >= as_of - pd.Timedelta(days=window_days)).to_numpy()
+        frame['recent_denied'] = frame['denied'] * frame['recent']
+        base_rate = frame['denied'].mean()
+
+        def shrink(denied, n):
+            return (denied + prior_strength * base_rate) / (n + prior_strength)
+
+        global_row = np.array([[len(frame), base_rate, base_rate, frame['amount'].mean(),
+                                frame['amount'].std(), frame['lag'].mean()]])
+        tables = {}
+        for col in ENTITIES:
+            g = frame.groupby(claims[col].to_numpy(), sort=False)
+            agg = g.agg(claims=('denied', 'size'), denied=('denied', 'sum'),
+                        recent=('recent', 'sum'), recent_denied=('recent_denied', 'sum'),
+                        claim_mean=('amount', 'mean'), claim_std=('amount', 'std'),
+                        report_lag_mean=('lag', 'mean'))
+            matrix = np.column_stack([
+                agg['claims'],
+                shrink(agg['denied'], agg['claims']),
+                shrink(agg['recent_denied'], agg['recent']),
+                agg['claim_mean'],
+                agg['claim_std'].fillna(global_row[0, 4]),
+                agg['report_lag_mean'],
+            ]).astype(float)
+            tables[col] = (pd.Index(agg.index.astype(str)), np.vstack([matrix, global_row]))
+        return cls(tables, window_days, prior_strength)
+
+    @staticmethod
+    def _history(claims):
+        txn = pd.to_datetime(claims['TXN_DATE_TIME']).to_numpy()
+        amount = claims['CLAIM_AMOUNT'].to_numpy(dtype=float)
+        frame = pd.DataFrame({
+            'txn': txn,
+            'n': 1.0,
+            'denied': (claims['CLAIM_STATUS'] == 'D').to_numpy(dtype=float),
+            'amount': amount,
+            'amount_sq': amount ** 2,
+            'lag': report_lag_days(claims),
+        })
+        return frame.sort_values('txn', kind='stable')
+
+    def point_in_time(self, claims):
+        """Entity features of every claim from the claims strictly before it.
+
+        Same columns as ``join``, but each claim only sees the claims with an
+        earlier ``TXN_DATE_TIME``, never its own ``CLAIM_STATUS``. An entity
+        without earlier claims gets the global row of that history, as unknown
+        entities do in ``join``. These are the training inputs of ``ClaimScorer``.
+        """
+        frame = self._history(claims)
+        txn = frame['txn']
+        history = pd.Timedelta(days=(txn.max() - txn.min()).days + 1)
+        recent = pd.Timedelta(days=self.window_days)
+        everyone = np.zeros(len(frame), dtype=int)
+
+        total = _prior_sums(frame, everyone, history)
+        n_total = total['n'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            base_rate = total['denied'].to_numpy() / n_total
+        global_mean, global_std, global_lag = _moments(total, (np.nan, np.nan, np.nan))
+
+        def shrink(denied, n):
+            return (denied + self.prior_strength * base_rate) / (n + self.prior_strength)
+
+        columns = {}
+        for col, prefix in ENTITIES.items():
+            keys = claims[col].astype(str).to_numpy()[frame.index]
+            prior = _prior_sums(frame, keys, history)
+            window = _prior_sums(frame, keys, recent)
+            n = prior['n'].to_numpy()
+            mean, std, lag = _moments(prior, (global_mean, global_std, global_lag))
+            known = n > 0
+            values = {
+                'claims': np.where(known, n, n_total),
+                'denial_rate': np.where(known, shrink(prior['denied'].to_numpy(), n), base_rate),
+                'denial_rate_recent': np.where(known, shrink(window['denied'].to_numpy(), window['n'].to_numpy()),
+                                               base_rate),
+                'claim_mean': mean,
+                'claim_std': np.where(n > 1, std, global_std),
+                'report_lag_mean': lag,
+            }
+            for name in FEATURES:
+                columns[f'{prefix}_{name}'] = values[name]
+        features = pd.DataFrame(columns, index=frame.index).sort_index()
+        features.index = claims.index
+        return features
+
+    def save(self, directory):
+        with open(os.path.join(directory, 'params.json'), 'w') as f:
+            json.dump({'window_days': self.window_days, 'prior_strength': self.prior_strength}, f)
+        for col, (index, matrix) in self.tables.items():
+            path = os.path.join(directory, ENTITIES[col])
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, 'features.npy'), matrix)
+            with open(os.path.join(path, 'keys.json'), 'w') as f:
+                json.dump(list(index), f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, 'params.json')) as f:
+            params = json.load(f)
+        tables = {}
+        for col, name in ENTITIES.items():
+            path = os.path.join(directory, name)
+            with open(os.path.join(path, 'keys.json')) as f:
+                index = pd.Index(json.load(f))
+            tables[col] = (index, np.load(os.path.join(path, 'features.npy'), mmap_mode=mmap_mode))
+        return cls(tables, **params)
+
+    def lookup(self, entity, key):
+        """Feature dict of one entity, the global row if it is unknown."""
+        index, matrix = self.tables[entity]
+        pos = index.get_indexer([str(key)])[0]
+        return dict(zip(FEATURES, matrix[pos].tolist()))
+
+    def join(self, claims):
+        """Entity features of a batch of claims, one row per claim."""
+        columns = {}
+        for col, prefix in ENTITIES.items():
+            index, matrix = self.tables[col]
+            # -1 (unknown) selects the trailing global row
+            rows = matrix[index.get_indexer(claims[col].astype(str))]
+            for k, name in enumerate(FEATURES):
+                columns[f'{prefix}_{name}'] = rows[:, k]
+        return pd.DataFrame(columns, index=claims.index)
+
+
+def claim_features(claims, store, point_in_time=False):
+    """Model inputs: entity features plus claim-level derived features.
+
+    Args:
+        claims (pd.DataFrame): claims to featurise.
+        store (FeatureStore): entity features.
+        point_in_time (bool): compute the entity features of each claim from the
+            earlier claims of ``claims`` (``FeatureStore.point_in_time``) instead
+            of joining the store's.
+    """
+    features = store.point_in_time(claims) if point_in_time else store.join(claims)
+    amount = claims['CLAIM_AMOUNT'].to_numpy(dtype=float)
+    for prefix in ('agent', 'vendor', 'customer'):
+        std = np.maximum(features[f'{prefix}_claim_std'].to_numpy(), 1.0)
+        features[f'{prefix}_claim_z'] = (amount - features[f'{prefix}_claim_mean'].to_numpy()) / std
+    features['report_lag'] = report_lag_days(claims)
+    features['claim_to_premium'] = amount / np.maximum(claims['PREMIUM_AMOUNT'].to_numpy(dtype=float), 1.0)
+    return features
+
+
+class ClaimScorer:
+    """Logistic denial-risk model over ``claim_features``."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def fit(self, claims, l2=1e-2, n_iter=500, learning_rate=0.1):
+        """Fit on the point-in-time features of a claims history, see ``FeatureStore.point_in_time``."""
+        X = claim_features(claims, self.store, point_in_time=True)
+        self.columns = list(X.columns)
+        X = X.to_numpy(dtype=float)
+        self.mean, self.scale = np.nanmean(X, axis=0), np.nanstd(X, axis=0) + 1e-9
+        X = np.nan_to_num((X - self.mean) / self.scale)
+        y = (claims['CLAIM_STATUS'] == 'D').to_numpy(dtype=float)
+
+        w, b = np.zeros(X.shape[1]), 0.0
+        for _ in range(n_iter):
+            p = expit(X @ w + b)
+            w -= learning_rate * (X.T @ (p - y) / len(y) + l2 * w)
+            b -= learning_rate * (p - y).mean()
+        self.coef, self.intercept = w, b
+        return self
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'columns': self.columns, 'coef': self.coef.tolist(), 'intercept': float(self.intercept),
+                       'mean': self.mean.tolist(), 'scale': self.scale.tolist()}, f)
+
+    @classmethod
+    def load(cls, path, store):
+        """Fitted scorer saved with ``save``, scoring against ``store``."""
+        with open(path) as f:
+            saved = json.load(f)
+        scorer = cls(store)
+        scorer.columns = saved['columns']
+        scorer.intercept = saved['intercept']
+        scorer.coef, scorer.mean, scorer.scale = (np.asarray(saved[k]) for k in ('coef', 'mean', 'scale'))
+        return scorer
+
+    def _predict(self, X):
+        X = np.nan_to_num((X - self.mean) / self.scale)
+        return expit(X @ self.coef + self.intercept)
+
+    def score(self, claims, point_in_time=False):
+        """Denial-risk probability of every claim in a batch.
+
+        ``point_in_time`` scores each claim from the claims before it in
+        ``claims``, for evaluating on claims the store already contains.
+        """
+        X = claim_features(claims, self.store, point_in_time)[self.columns].to_numpy(dtype=float)
+        return pd.Series(self._predict(X), index=claims.index, name='RISK_SCORE')
+
+    def score_one(self, claim):
+        """Risk of a single claim given as a dict, for scoring at intake."""
+        values = {}
+        for col, prefix in ENTITIES.items():
+            for name, value in self.store.lookup(col, claim[col]).items():
+                values[f'{prefix}_{name}'] = value
+        amount = float(claim['CLAIM_AMOUNT'])
+        for prefix in ('agent', 'vendor', 'customer'):
+            std = max(values[f'{prefix}_claim_std'], 1.0)
+            values[f'{prefix}_claim_z'] = (amount - values[f'{prefix}_claim_mean']) / std
+        values['report_lag'] = (pd.Timestamp(claim['REPORT_DT']) - pd.Timestamp(claim['LOSS_DT'])).days
+        values['claim_to_premium'] = amount / max(float(claim['PREMIUM_AMOUNT']), 1.0)
+        X = np.array([[values[c] for c in self.columns]], dtype=float)
+        return float(self._predict(X)[0])
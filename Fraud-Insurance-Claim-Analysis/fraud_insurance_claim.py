@@ -11,191 +11,104 @@ Original file is located at
 I've uploaded the dashboard chart to GitHub for your reference. Although interactive charts won't be directly viewable on GitHub, you can easily access and explore them. Simply download the project files and run them on Google Colab to fully interact with the charts.
 """
 
-!pip install pandasql
 !pip install plotly
-!pip install streamlit
 
-import pandasql as psql
 import pandas as pd
 import plotly.express as py
-import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
+from claims_analytics import ClaimsAnalytics
+from claims_store import ClaimsStore
 
-insurace_tabel = pd.read_csv('/content/insurance_data.csv')
-employee_tabel = pd.read_csv('/content/employee_data.csv')
-vendor_tabel = pd.read_csv('/content/vendor_data.csv')
+# The claims live in a persistent SQLite file. Only transactions that are not stored
+# yet are inserted, and only those are joined with the agent and vendor tables.
+store = ClaimsStore('/content/claims.db')
+store.load_csv('/content/insurance_data.csv', '/content/employee_data.csv', '/content/vendor_data.csv')
 
-query = """
-SELECT * FROM insurace_tabel
-LIMIT 5;
-"""
-psql.sqldf(query, locals())
+store.query("SELECT * FROM insurance LIMIT 5")
 
-query = """
-SELECT * FROM employee_tabel
-LIMIT 5;
-"""
-psql.sqldf(query,locals())
+store.query("SELECT * FROM employee LIMIT 5")
 
-query = """
-SELECT * FROM vendor_tabel
-LIMIT 5;
-"""
-psql.sqldf(query,locals())
-
-employee_tabel1 = psql.sqldf("""
-SELECT  AGENT_ID, POSTAL_CODE AS AGENT_POSTAL_CODE, STATE As AGENT_STATE
-FROM employee_tabel
-""",locals())
-employee_tabel1.head()
-
-vendor_tabel1 = psql.sqldf("""
-SELECT  VENDOR_ID, POSTAL_CODE As VENDOR_POSTAL_CODE, STATE As VENDOR_STATE
-FROM vendor_tabel
-""",locals())
-vendor_tabel1.head()
-
-# Join 3 tables based on Vendor_ID and Agent_ID 3 tables based on Vendor_ID and Agent_ID
-query = """
-WITH combineTable AS (SELECT * FROM insurace_tabel
-INNER JOIN employee_tabel1
-ON insurace_tabel.Agent_ID = employee_tabel1.Agent_ID
-INNER JOIN vendor_tabel1
-ON insurace_tabel.Vendor_ID = vendor_tabel1.Vendor_ID
-)
-SELECT * FROM combineTable;
+store.query("SELECT * FROM vendor LIMIT 5")
 
-"""
-combineTable = psql.sqldf(query,locals())
+# Join 3 tables based on Vendor_ID and Agent_ID. The join is maintained by the store;
+# every summary below is a vectorized group-by over it, with the overall claim
+# total and denied count computed a single time.
+combineTable = store.read_joined()
+analytics = ClaimsAnalytics(combineTable)
 combineTable.head()
 
 #TOTAL Claim Filed by Each Agent
-query = """
-SELECT
-AGENT_ID,
-AGENT_STATE,
-SUM(CLAIM_AMOUNT) AS TOTAL_CLAIM_AMOUNT,
-ROUND(AVG(CLAIM_AMOUNT),2) AS AVERAGE_CLAIM,
-(SUM(CLAIM_AMOUNT) / CAST((SELECT SUM(CLAIM_AMOUNT) FROM combineTable) AS FLOAT) * 100) AS PERCENTAGE_TOTAL_CLAIM,
-(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END) / CAST((SELECT COUNT(*) FROM combineTable WHERE CLAIM_STATUS = 'D') AS FLOAT) * 100) AS LIKELIHOOD_FRAUD_CLAIM
-FROM combineTable
-GROUP BY AGENT_ID
-ORDER BY TOTAL_CLAIM_AMOUNT DESC
-"""
-psql.sqldf(query,locals())
+analytics.agent_summary()
 
 #TOTAL Claim Filed by Each VENDOR
-query = """
-SELECT
-VENDOR_ID,
-VENDOR_STATE,
-SUM(CLAIM_AMOUNT) AS TOTAL_CLAIM_AMOUNT,
-ROUND(AVG(CLAIM_AMOUNT),2) AS AVERAGE_CLAIM,
-(SUM(CLAIM_AMOUNT) / CAST((SELECT SUM(CLAIM_AMOUNT) FROM combineTable) AS FLOAT) * 100) AS PERCENTAGE_TOTAL_CLAIM,
-(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END) / CAST((SELECT COUNT(*) FROM combineTable WHERE CLAIM_STATUS = 'D') AS FLOAT) * 100) AS LIKELIHOOD_FRAUD_CLAIM
-FROM combineTable
-GROUP BY VENDOR_ID
-ORDER BY TOTAL_CLAIM_AMOUNT DESC
-"""
-psql.sqldf(query,locals())
+analytics.vendor_summary()
 
 #Total Claim filed by STATE
-query = """
-SELECT
-STATE,
-SUM(CLAIM_AMOUNT) AS TOTAL_CLAIM_AMOUNT,
-ROUND(AVG(CLAIM_AMOUNT),2) AS AVERAGE_CLAIM,
-(SUM(CLAIM_AMOUNT) / CAST((SELECT SUM(CLAIM_AMOUNT) FROM combineTable) AS FLOAT) * 100) AS PERCENTAGE_TOTAL_CLAIM,
-(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END) / CAST((SELECT COUNT(*) FROM combineTable WHERE CLAIM_STATUS = 'D') AS FLOAT) * 100) AS LIKELIHOOD_FRAUD_CLAIM
-
-FROM combineTable
-GROUP BY STATE
-ORDER BY TOTAL_CLAIM_AMOUNT DESC
-"""
-sate_wise= psql.sqldf(query,locals())
+sate_wise = analytics.state_summary()
 sate_wise
 
-query="""
-SELECT
-VENDOR_STATE,
-AGENT_STATE,
-INCIDENT_STATE,
-INCIDENT_CITY,
-INCIDENT_HOUR_OF_THE_DAY,
-CLAIM_AMOUNT
-
-FROM combineTable
-
-GROUP BY
-VENDOR_STATE, AGENT_STATE,INCIDENT_STATE, INCIDENT_CITY, INCIDENT_HOUR_OF_THE_DAY
-
-ORDER BY
-VENDOR_STATE,
-AGENT_STATE,
-INCIDENT_STATE,
-INCIDENT_CITY,
-INCIDENT_HOUR_OF_THE_DAY
-"""
-psql.sqldf(query,locals())
+location_keys = ['VENDOR_STATE', 'AGENT_STATE', 'INCIDENT_STATE', 'INCIDENT_CITY', 'INCIDENT_HOUR_OF_THE_DAY']
+analytics.first_per_group(location_keys, ['CLAIM_AMOUNT'])
 
 #all Insurance TYPES
-query = """
-SELECT
-INSURANCE_TYPE,
-SUM(CLAIM_AMOUNT) AS TOTAL_CLAIM_AMOUNT,
-ROUND(AVG(CLAIM_AMOUNT),2) AS AVERAGE_CLAIM,
-(SUM(CLAIM_AMOUNT) / CAST((SELECT SUM(CLAIM_AMOUNT) FROM combineTable) AS FLOAT) * 100) AS PERCENTAGE_TOTAL_CLAIM,
-(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END) / CAST((SELECT COUNT(*) FROM combineTable WHERE CLAIM_STATUS = 'D') AS FLOAT) * 100) AS LIKELIHOOD_FRAUD_CLAIM
-
-FROM combineTable
-GROUP BY INSURANCE_TYPE
-ORDER BY TOTAL_CLAIM_AMOUNT DESC
-"""
-insurance_type = psql.sqldf(query,locals())
+insurance_type = analytics.insurance_type_summary()
 insurance_type
 
 #INCIDENT_SEVERITY
-query = """
-SELECT
-COUNT(*) as count,
-(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM combineTable)) as INCIDENT_SEV_PERC,
-INCIDENT_SEVERITY,
-SUM(CLAIM_AMOUNT) AS TOTAL_CLAIM_AMOUNT,
-ROUND(AVG(CLAIM_AMOUNT),2) AS AVERAGE_CLAIM,
-(SUM(CLAIM_AMOUNT) / CAST((SELECT SUM(CLAIM_AMOUNT) FROM combineTable) AS FLOAT) * 100) AS PERCENTAGE_TOTAL_CLAIM,
-(SUM(CASE WHEN CLAIM_STATUS = 'D' THEN 1 ELSE 0 END) / CAST((SELECT COUNT(*) FROM combineTable WHERE CLAIM_STATUS = 'D') AS FLOAT) * 100) AS LIKELIHOOD_FRAUD_CLAIM
-
-FROM combineTable
-GROUP BY INCIDENT_SEVERITY
-ORDER BY TOTAL_CLAIM_AMOUNT DESC
-"""
-incident_severity = psql.sqldf(query,locals())
+incident_severity = analytics.incident_severity_summary()
 incident_severity
 
 #Lets see MOTOR by grouping with state and housetype
-query = """
-SELECT CLAIM_AMOUNT, MARITAL_STATUS, AGE, NO_OF_FAMILY_MEMBERS, STATE, EMPLOYMENT_STATUS, HOUSE_TYPE, SOCIAL_CLASS, INCIDENT_SEVERITY,POLICE_REPORT_AVAILABLE, CLAIM_STATUS
-FROM combineTable
-WHERE INSURANCE_TYPE = 'Motor'
-GROUP BY STATE, HOUSE_TYPE
-"""
-psql.sqldf(query,locals())
+analytics.first_per_group(['STATE', 'HOUSE_TYPE'],
+                          ['CLAIM_AMOUNT', 'MARITAL_STATUS', 'AGE', 'NO_OF_FAMILY_MEMBERS', 'EMPLOYMENT_STATUS',
+                           'SOCIAL_CLASS', 'INCIDENT_SEVERITY', 'POLICE_REPORT_AVAILABLE', 'CLAIM_STATUS'],
+                          mask=combineTable['INSURANCE_TYPE'] == 'Motor')
 
 #Check to find any annamolies between agent and vendor for filing false claim
 #see in how many clims there where same agent and vendor involved
+analytics.agent_vendor_pairs(min_count=2)
 
-query = """SELECT AGENT_ID, VENDOR_ID, CLAIM_STATUS, COUNT(*) AS frequency
-FROM combineTable
-GROUP BY AGENT_ID, VENDOR_ID
-HAVING COUNT(*) > 1
-"""
-psql.sqldf(query,locals())
+# Beyond repeated agent-vendor pairs: a sparse agent-vendor-customer graph whose edges are
+# scored by excess denials; connected groups of suspicious edges are candidate rings.
+from collusion import CollusionGraph
+
+collusion_graph = CollusionGraph(combineTable)
+collusion_graph.edge_table(min_claims=2).head(20)
+
+collusion_graph.rings(min_score=1.0, min_size=3)
+
+# Per-entity features (denial rates, claim-amount statistics, report lag) are precomputed
+# and persisted, so new claims are scored at intake with a handful of index lookups.
+# The scorer is trained on each claim's features as of its own transaction time, so a
+# claim's status never feeds its own features; it is evaluated on the latest 20% of claims.
+from sklearn.metrics import roc_auc_score
+from feature_store import ClaimScorer, FeatureStore
+
+feature_store = FeatureStore.build(combineTable, window_days=90)
+feature_store.save('/content/feature_store')
+
+txn_time = pd.to_datetime(combineTable['TXN_DATE_TIME'])
+train = txn_time < txn_time.quantile(0.8)
+scorer = ClaimScorer(feature_store).fit(combineTable[train])
+held_out = combineTable[~train].assign(RISK_SCORE=scorer.score(combineTable, point_in_time=True)[~train])
+print('held-out AUC:', roc_auc_score(held_out['CLAIM_STATUS'] == 'D', held_out['RISK_SCORE']))
+held_out.nlargest(10, 'RISK_SCORE')
+
+# refit on the full history and persist, intake scoring loads it without refitting
+scorer = ClaimScorer(feature_store).fit(combineTable)
+scorer.save('/content/feature_store/scorer.json')
 
 """# visualizing"""
 
+# The dashboard reads the aggregates the store maintains incrementally on every load,
+# so refreshing it only costs the newly arrived claims.
+insurance_type = store.aggregate('INSURANCE_TYPE')
+sate_wise = store.aggregate('STATE')
+incident_severity = store.aggregate('INCIDENT_SEVERITY')
+
 fig1 = go.Figure(data=[go.Pie(
     labels=insurance_type['INSURANCE_TYPE'],
     values=insurance_type['TOTAL_CLAIM_AMOUNT'],
@@ -250,12 +163,16 @@ fig12s.update_layout(template="seaborn", title_text="Incident_Severity")
 
 fig12s.show()
 
+# Histograms are binned inside the store; the same figures are served by dashboard.py.
+claim_hist = store.histogram('CLAIM_AMOUNT', bins=30)
+premium_hist = store.histogram('PREMIUM_AMOUNT', bins=30)
+
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
-ax1.hist(combineTable['CLAIM_AMOUNT'], bins=30, color='skyblue')
+ax1.stairs(claim_hist['counts'], claim_hist['edges'], fill=True, color='skyblue')
 ax1.set_title('Claim Amount Distribution')
 ax1.set_xlabel('Claim Amount')
 ax1.set_ylabel('Frequency')
-ax2.hist(combineTable['PREMIUM_AMOUNT'], bins=30, color='salmon')
+ax2.stairs(premium_hist['counts'], premium_hist['edges'], fill=True, color='salmon')
 ax2.set_title('Premium Amount Distribution')
 ax2.set_xlabel('Premium Amount')
 ax2.set_ylabel('Frequency')
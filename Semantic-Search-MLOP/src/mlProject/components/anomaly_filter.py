@@ -0,0 +1,99 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+from mlProject import logger
+from mlProject.entity.config_entity import AnomalyFilterConfig
+
+
+
+def sample_csv(path, n, columns=None, chunksize=100000, seed=42):
+    """Uniform random sample of ``n`` rows of a CSV file, holding at most ``n + chunksize`` rows."""
+    rng = np.random.default_rng(seed)
+    kept, keys = None, np.empty(0)
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        rows = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        if len(keys) > n:
+            order = np.argpartition(keys, n)[:n]
+            rows, keys = rows.iloc[order].reset_index(drop=True), keys[order]
+        kept = rows
+    return kept
+
+
+
+class AnomalyFilter:
+    """Isolation Forest filter between data validation and data transformation.
+
+    The forest is fitted once on a bounded random sample of the validated data
+    and persisted; later runs load it unless ``refit`` is set. Scoring streams
+    the data in chunks, each chunk split over ``n_jobs`` threads, and produces
+    boolean inlier masks, so only the rows that are kept are written out for
+    the transformation stage.
+    """
+
+    def __init__(self, config: AnomalyFilterConfig):
+        self.config = config
+        self.model = None
+        self.columns = None
+
+
+    def _columns(self):
+        if self.config.columns:
+            return list(self.config.columns)
+        header = pd.read_csv(self.config.data_path, nrows=0).columns
+        return [c for c in header if c != self.config.target_column]
+
+
+    def fit(self):
+        if os.path.exists(self.config.model_path) and not self.config.refit:
+            self.model, self.columns = joblib.load(self.config.model_path)
+            logger.info(f"anomaly filter loaded from: {self.config.model_path}")
+            return self.model
+
+        self.columns = self._columns()
+        sample = sample_csv(self.config.data_path, self.config.sample_size, self.columns, self.config.chunksize)
+        self.model = IsolationForest(n_estimators=self.config.n_estimators,
+                                     contamination=self.config.contamination, random_state=42)
+        self.model.fit(sample[self.columns].to_numpy())
+        joblib.dump((self.model, self.columns), self.config.model_path)
+        logger.info(f"anomaly filter fitted on {len(sample)} rows and saved at: {self.config.model_path}")
+        return self.model
+
+
+    def _predict(self, X):
+        return self.model.predict(X) != -1
+
+
+    def mask(self, df):
+        """Boolean mask of the inlier rows of ``df``."""
+        X = df[self.columns].to_numpy()
+        step = max(1, -(-len(X) // self.config.n_jobs))
+        if self.config.n_jobs == 1 or len(X) < 2 * step:
+            return self._predict(X)
+        parts = Parallel(n_jobs=self.config.n_jobs, prefer="threads")(
+            delayed(self._predict)(X[start:start + step]) for start in range(0, len(X), step))
+        return np.concatenate(parts)
+
+
+    def iter_masks(self, path):
+        """Yield ``(chunk, mask)`` for a CSV file, ``chunksize`` rows at a time."""
+        for chunk in pd.read_csv(path, chunksize=self.config.chunksize):
+            yield chunk, self.mask(chunk)
+
+
+    def filter_data(self):
+        if self.model is None:
+            self.fit()
+
+        rows, kept = 0, 0
+        for i, (chunk, mask) in enumerate(self.iter_masks(self.config.data_path)):
+            chunk[mask].to_csv(self.config.filtered_data_path, mode="w" if i == 0 else "a",
+                               header=i == 0, index=False)
+            rows += len(chunk)
+            kept += int(mask.sum())
+
+        logger.info(f"anomaly filter kept {kept} of {rows} rows: {self.config.filtered_data_path}")
+        return rows, kept
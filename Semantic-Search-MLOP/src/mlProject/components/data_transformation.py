@@ -12,7 +12,8 @@ class DataTransformation:
 
     def train_test_spliting(self):
         data = pd.read_csv(self.config.data_path)
-        train, test = train_test_split(data)
+        # a fixed split keeps train.csv identical across runs, so the feature selection SVD cache can hit
+        train, test = train_test_split(data, test_size=self.config.test_size, random_state=self.config.random_state)
 
         train.to_csv(os.path.join(self.config.root_dir, "train.csv"),index = False)
         test.to_csv(os.path.join(self.config.root_dir, "test.csv"), index = False)
@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.linear_model import ElasticNet
+from sklearn.model_selection import cross_val_score
+from mlProject import logger
+from mlProject.entity.config_entity import FeatureSelectionConfig
+
+
+
+def rank_features(VT, n_components):
+    """Features ordered by the summed absolute loadings on the first components."""
+    importance = np.abs(VT[:n_components]).sum(axis=0)
+    return np.argsort(importance, kind="stable")[::-1]
+
+
+
+def _cv_score(X, y, columns, alpha, l1_ratio, cv_folds):
+    model = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, random_state=42)
+    scores = cross_val_score(model, X[:, columns], y, cv=cv_folds, scoring="neg_root_mean_squared_error")
+    return scores.mean(), scores.std()
+
+
+
+class FeatureSelection:
+    """SVD-based feature selection between data transformation and model training.
+
+    One decomposition of the standardised training features is enough for every
+    (number of components, number of features) setting: the ranking for ``k``
+    components only reads the first ``k`` rows of ``VT``. Decompositions are
+    cached on disk under a hash of the data, so re-running the stage or
+    sweeping other settings on the same data does not repeat the SVD; the
+    train/test split is seeded in ``params.yaml`` so full pipeline runs
+    produce the same training data. Only the ``cache_size`` most recently
+    used decompositions are kept. The candidate settings are cross-validated
+    in parallel.
+    """
+
+    def __init__(self, config: FeatureSelectionConfig):
+        self.config = config
+
+
+    def _data_hash(self, X, columns):
+        digest = hashlib.sha1()
+        digest.update(json.dumps(list(columns)).encode())
+        digest.update(str(X.shape).encode())
+        digest.update(np.ascontiguousarray(X).tobytes())
+        return digest.hexdigest()
+
+
+    def decomposition(self, X, columns):
+        """Singular values and right singular vectors of the standardised ``X``, cached."""
+        path = os.path.join(self.config.cache_dir, f"{self._data_hash(X, columns)}.npz")
+        if os.path.exists(path):
+            logger.info(f"SVD loaded from cache: {path}")
+            # the modification time orders the entries for eviction
+            os.utime(path)
+            cached = np.load(path)
+            return cached["S"], cached["VT"]
+
+        std = X.std(axis=0)
+        Z = (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+        _, S, VT = np.linalg.svd(Z, full_matrices=False)
+        np.savez(path, S=S, VT=VT)
+        logger.info(f"SVD computed and cached at: {path}")
+        self._evict()
+        return S, VT
+
+
+    def _evict(self):
+        """Delete all but the ``cache_size`` most recently used cached decompositions."""
+        entries = [os.path.join(self.config.cache_dir, name) for name in os.listdir(self.config.cache_dir)
+                   if name.endswith(".npz")]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.config.cache_size:]:
+            os.remove(path)
+            logger.info(f"SVD cache entry evicted: {path}")
+
+
+    def sweep(self, X, y, VT):
+        """Cross-validated RMSE of every (n_components, n_features) candidate."""
+        max_components = VT.shape[0]
+        candidates = []
+        for k in sorted({min(k, max_components) for k in self.config.n_components}):
+            order = rank_features(VT, k)
+            for n in sorted({min(n, X.shape[1]) for n in self.config.n_features}):
+                candidates.append((k, n, order[:n]))
+
+        scores = Parallel(n_jobs=self.config.n_jobs)(
+            delayed(_cv_score)(X, y, selected, self.config.alpha, self.config.l1_ratio, self.config.cv_folds)
+            for _, _, selected in candidates)
+
+        return pd.DataFrame([
+            {"n_components": k, "n_features": n, "rmse": -mean, "rmse_std": std, "selected": list(selected)}
+            for (k, n, selected), (mean, std) in zip(candidates, scores)
+        ])
+
+
+    def select_features(self):
+        train = pd.read_csv(self.config.train_data_path)
+        test = pd.read_csv(self.config.test_data_path)
+
+        features = [c for c in train.columns if c != self.config.target_column]
+        X = train[features].to_numpy(dtype=float)
+        y = train[self.config.target_column].to_numpy()
+
+        _, VT = self.decomposition(X, features)
+        results = self.sweep(X, y, VT)
+        # lowest RMSE, fewer features on ties
+        best = results.sort_values(["rmse", "n_features"]).iloc[0]
+        selected = [features[i] for i in best["selected"]]
+
+        results.assign(selected=[[features[i] for i in s] for s in results["selected"]]).to_csv(
+            os.path.join(self.config.root_dir, "sweep.csv"), index=False)
+        with open(self.config.selected_features_file, "w") as f:
+            json.dump({"features": selected, "all_features": features,
+                       "n_components": int(best["n_components"]), "rmse": float(best["rmse"])}, f, indent=4)
+
+        columns = selected + [self.config.target_column]
+        train[columns].to_csv(os.path.join(self.config.root_dir, "train.csv"), index=False)
+        test[columns].to_csv(os.path.join(self.config.root_dir, "test.csv"), index=False)
+
+        logger.info(f"selected {len(selected)} of {len(features)} features with "
+                    f"{int(best['n_components'])} components, CV RMSE {best['rmse']:.4f}")
+        return selected
@@ -1,6 +1,6 @@
 from mlProject.constants import *
 from mlProject.utils.common import read_yaml, create_directories
-from mlProject.entity.config_entity import (DataIngestionConfig, DataValidationConfig, DataTransformationConfig, ModelTrainerConfig,ModelEvaluationConfig)
+from mlProject.entity.config_entity import (DataIngestionConfig, DataValidationConfig, AnomalyFilterConfig, DataTransformationConfig, FeatureSelectionConfig, ModelTrainerConfig,ModelEvaluationConfig)
 
 
 
@@ -51,20 +51,77 @@ class ConfigurationManager:
     
 
 
+    def get_anomaly_filter_config(self) -> AnomalyFilterConfig:
+        config = self.config.anomaly_filter
+        params = self.params.AnomalyFilter
+        schema =  self.schema.TARGET_COLUMN
+
+        create_directories([config.root_dir])
+
+        anomaly_filter_config = AnomalyFilterConfig(
+            root_dir=config.root_dir,
+            data_path=config.data_path,
+            model_path=config.model_path,
+            filtered_data_path=config.filtered_data_path,
+            columns = list(params.columns),
+            sample_size = params.sample_size,
+            chunksize = params.chunksize,
+            n_jobs = params.n_jobs,
+            n_estimators = params.n_estimators,
+            contamination = params.contamination,
+            refit = params.refit,
+            target_column = schema.name
+        )
+
+        return anomaly_filter_config
+    
+
+
     def get_data_transformation_config(self) -> DataTransformationConfig:
         config = self.config.data_transformation
+        params = self.params.DataTransformation
 
         create_directories([config.root_dir])
 
         data_transformation_config = DataTransformationConfig(
             root_dir=config.root_dir,
             data_path=config.data_path,
+            test_size=params.test_size,
+            random_state=params.random_state,
         )
 
         return data_transformation_config
     
 
 
+    def get_feature_selection_config(self) -> FeatureSelectionConfig:
+        config = self.config.feature_selection
+        params = self.params.FeatureSelection
+        model_params = self.params.ElasticNet
+        schema =  self.schema.TARGET_COLUMN
+
+        create_directories([config.root_dir, config.cache_dir])
+
+        feature_selection_config = FeatureSelectionConfig(
+            root_dir=config.root_dir,
+            train_data_path = config.train_data_path,
+            test_data_path = config.test_data_path,
+            cache_dir = config.cache_dir,
+            selected_features_file = config.selected_features_file,
+            n_components = list(params.n_components),
+            n_features = list(params.n_features),
+            cv_folds = params.cv_folds,
+            n_jobs = params.n_jobs,
+            cache_size = params.cache_size,
+            alpha = model_params.alpha,
+            l1_ratio = model_params.l1_ratio,
+            target_column = schema.name
+        )
+
+        return feature_selection_config
+    
+
+
     def get_model_trainer_config(self) -> ModelTrainerConfig:
         config = self.config.model_trainer
         params = self.params.ElasticNet
@@ -20,10 +20,47 @@ class DataValidationConfig:
 
 
 
+@dataclass(frozen=True)
+class AnomalyFilterConfig:
+    root_dir: Path
+    data_path: Path
+    model_path: Path
+    filtered_data_path: Path
+    columns: list
+    sample_size: int
+    chunksize: int
+    n_jobs: int
+    n_estimators: int
+    contamination: str
+    refit: bool
+    target_column: str
+
+
+
 @dataclass(frozen=True)
 class DataTransformationConfig:
     root_dir: Path
     data_path: Path
+    test_size: float
+    random_state: int
+
+
+
+@dataclass(frozen=True)
+class FeatureSelectionConfig:
+    root_dir: Path
+    train_data_path: Path
+    test_data_path: Path
+    cache_dir: Path
+    selected_features_file: Path
+    n_components: list
+    n_features: list
+    cv_folds: int
+    n_jobs: int
+    cache_size: int
+    alpha: float
+    l1_ratio: float
+    target_column: str
 
 
 
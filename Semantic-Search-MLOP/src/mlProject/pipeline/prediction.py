@@ -1,4 +1,5 @@
 import joblib 
+import json
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -8,9 +9,22 @@ from pathlib import Path
 class PredictionPipeline:
     def __init__(self):
         self.model = joblib.load(Path('artifacts/model_trainer/model.joblib'))
+        self.features = None
+        selected_path = Path('artifacts/feature_selection/selected_features.json')
+        if selected_path.exists():
+            with open(selected_path) as f:
+                selected = json.load(f)
+            self.features = selected["features"]
+            self.positions = [selected["all_features"].index(c) for c in self.features]
 
     
     def predict(self, data):
+        if self.features is not None:
+            # the model was trained on the selected features only
+            if isinstance(data, pd.DataFrame):
+                data = data[self.features]
+            else:
+                data = np.asarray(data)[:, self.positions]
         prediction = self.model.predict(data)
 
         return prediction
\ No newline at end of file
@@ -0,0 +1,26 @@
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.anomaly_filter import AnomalyFilter
+from mlProject import logger
+
+STAGE_NAME = "Anomaly Filter stage"
+
+class AnomalyFilterTrainingPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        anomaly_filter_config = config.get_anomaly_filter_config()
+        anomaly_filter = AnomalyFilter(config=anomaly_filter_config)
+        anomaly_filter.fit()
+        anomaly_filter.filter_data()
+
+if __name__ == '__main__':
+    try:
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        obj = AnomalyFilterTrainingPipeline()
+        obj.main()
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx======x")
+    except Exception as e:
+        logger.exception(e)
+        raise e
\ No newline at end of file
@@ -0,0 +1,25 @@
+from mlProject.config.configuration import ConfigurationManager
+from mlProject.components.feature_selection import FeatureSelection
+from mlProject import logger
+
+STAGE_NAME = "Feature Selection stage"
+
+class FeatureSelectionTrainingPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        feature_selection_config = config.get_feature_selection_config()
+        feature_selection = FeatureSelection(config=feature_selection_config)
+        feature_selection.select_features()
+
+if __name__ == '__main__':
+    try:
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        obj = FeatureSelectionTrainingPipeline()
+        obj.main()
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx======x")
+    except Exception as e:
+        logger.exception(e)
+        raise e
\ No newline at end of file